@@ -0,0 +1,387 @@
+"""
+Offline benchmark for the startup and grant pipeline profiles.
+
+Starts local stand-ins for everything the scrapers talk to: an HTTP server
+with a synthetic corpus of startup and grant pages of varied sizes, a fake
+PostgREST (plus Storage upload) for the startup_urls/startup/grant_urls/
+grant_programs tables, and a fake chat-completion endpoint with a
+configurable latency. Each profile then runs in its own subprocess against
+them and the run reports URLs/sec, p50/p99 latency per stage and peak RSS.
+
+    python benchmark.py [--pages 200] [--latency 0.2] [--json results.json]
+    python -m pipeline benchmark [startup|grant] [--pages 200]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Reported stage -> telemetry histogram and its labels
+STAGES = {
+    "fetch": ("fetch_seconds", {}),
+    "html_parse": ("parse_seconds", {}),
+    "model": ("model_call_seconds", {}),
+    "response_parse": ("response_parse_seconds", {}),
+    "db_write": ("db_write_seconds", {"table": "{table}"}),
+}
+DEFAULT_PAGES = 200
+DEFAULT_LATENCY = 0.2  # Seconds the fake model takes per completion
+DEFAULT_HOSTS = 8  # Loopback addresses the corpus is spread over, so the per-host throttle has something to do
+# Far above llm_client.TOKENS_PER_MINUTE so the account limit doesn't hide the pipeline's own throughput
+DEFAULT_TOKENS_PER_MINUTE = 10_000_000
+PAGE_SIZES = (2_000, 10_000, 40_000, 120_000)  # Approximate text bytes per page; larger ones get chunked
+
+SECTORS = ["EdTech", "FinTech", "AgriTech", "HealthTech", "CleanTech", "Logistics", "E-commerce", "Social Impact"]
+WORDS = ("platform students payments farmers clinics solar waste recycling logistics marketplace rural "
+         "women micro enterprises water sanitation learning credit insurance drones supply chain").split()
+
+_startup_name = re.compile(r"Startup-(\d+)")
+_fund_name = re.compile(r"Fund-(\d+)")
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_page(kind, number, size, rng):
+    """Synthetic HTML page of roughly `size` bytes listing a few startups or funds."""
+    title = f"{kind.title()} directory page {number}"
+    blocks = []
+    length = 0
+    item = 0
+    while length < size:
+        name = f"Startup-{number * 100 + item}" if kind == "startup" else f"Fund-{number * 100 + item}"
+        text = (f"<h2>{name}</h2><p>{name} works in {rng.choice(SECTORS)}. "
+                + " ".join(_sentence(rng) for _ in range(rng.randint(3, 12))) + "</p>")
+        blocks.append(text)
+        length += len(text)
+        item += 1
+    nav = "<nav>" + " ".join(f"<a href='/{i}'>Link {i}</a>" for i in range(20)) + "</nav>"
+    script = "<script>var tracking = {};</script>"
+    return f"<html><head><title>{title}</title>{script}</head><body>{nav}{''.join(blocks)}</body></html>"
+
+
+def make_corpus(pages, seed=1):
+    """{path: html} for `pages` startup pages and `pages` grant pages."""
+    rng = random.Random(seed)
+    corpus = {}
+    for kind in ("startup", "grant"):
+        for number in range(pages):
+            corpus[f"/{kind}/{number}"] = make_page(kind, number, rng.choice(PAGE_SIZES), rng)
+    return corpus
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+
+def _serve(handler, host="127.0.0.1", port=0):
+    server = _Server((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    corpus = {}
+
+    def do_GET(self):
+        page = self.corpus.get(self.path)
+        if page is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = page.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class RestHandler(BaseHTTPRequestHandler):
+    """
+    Just enough PostgREST for the scrapers: select with eq/neq/gt/not.is.null
+    filters, order and limit; bulk POST with on_conflict merging; the
+    reserve_startup_numbers RPC; Storage uploads are accepted and discarded.
+    """
+    protocol_version = "HTTP/1.1"
+    tables = {}
+    last_no = 0
+    lock = threading.Lock()
+
+    def _send(self, status, body=b""):
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        table = parts.path.rsplit("/", 1)[1]
+        query = {key: values[0] for key, values in parse_qs(parts.query).items()}
+        with self.lock:
+            rows = list(self.tables.get(table, []))
+        for column, condition in query.items():
+            if column in ("select", "order", "limit", "offset"):
+                continue
+            op, _, value = condition.partition(".")
+            if op == "eq":
+                rows = [r for r in rows if str(r.get(column)) == value]
+            elif op == "neq":
+                rows = [r for r in rows if str(r.get(column)) != value]
+            elif op == "gt":
+                rows = [r for r in rows if r.get(column) is not None and r[column] > type(r[column])(value)]
+            elif condition == "not.is.null":
+                rows = [r for r in rows if r.get(column) is not None]
+        if "order" in query:
+            column, _, direction = query["order"].partition(".")
+            rows = [r for r in rows if r.get(column) is not None]
+            rows.sort(key=lambda r: r[column], reverse=direction.startswith("desc"))
+        if "limit" in query:
+            rows = rows[:int(query["limit"])]
+        if query.get("select", "*") != "*":
+            columns = query["select"].split(",")
+            rows = [{c: r.get(c) for c in columns} for r in rows]
+        self._send(200, json.dumps(rows).encode("utf-8"))
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if "/storage/v1/" in parts.path:
+            self._send(200, b"{}")
+            return
+        if parts.path.endswith("/rpc/reserve_startup_numbers"):
+            block_size = json.loads(body)["block_size"]
+            with self.lock:
+                first = RestHandler.last_no + 1
+                RestHandler.last_no += block_size
+            self._send(200, json.dumps(first).encode("utf-8"))
+            return
+        table = parts.path.rsplit("/", 1)[1]
+        on_conflict = parse_qs(parts.query).get("on_conflict", [None])[0]
+        rows = json.loads(body)
+        if isinstance(rows, list) and len({frozenset(row) for row in rows}) > 1:
+            # Like PostgREST, which builds one column list for a bulk insert
+            self._send(400, b'{"message": "All object keys must match"}')
+            return
+        with self.lock:
+            stored = self.tables.setdefault(table, [])
+            by_key = {r.get(on_conflict): r for r in stored} if on_conflict else {}
+            for row in rows if isinstance(rows, list) else [rows]:
+                existing = by_key.get(row.get(on_conflict)) if on_conflict else None
+                if existing is not None:
+                    existing.update(row)
+                    continue
+                row = dict(row)
+                if table == "grant_programs":
+                    row.setdefault("id", len(stored) + 1)
+                stored.append(row)
+                if on_conflict:
+                    by_key[row.get(on_conflict)] = row
+        self._send(201)
+
+    def log_message(self, *args):
+        pass
+
+
+class ChatHandler(BaseHTTPRequestHandler):
+    """
+    Fake /v1/chat/completions: sleeps `latency` seconds, then answers a
+    function call listing every Startup-N or Fund-N named in the prompt.
+    """
+    protocol_version = "HTTP/1.1"
+    latency = DEFAULT_LATENCY
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        time.sleep(self.latency)
+        text = request["messages"][-1]["content"]
+        function = (request.get("functions") or [{}])[0].get("name")
+        if function == "record_grant_programs" or (function is None and "grant" in text.lower()):
+            names = sorted(set(_fund_name.findall(text)), key=int)
+            arguments = {"programs": [{
+                "company_name": f"Agency {int(n) // 100}",
+                "fund_name": f"Fund-{n}",
+                "website_url": f"https://agency-{int(n) // 100}.example",
+                "description_services": f"Grants from Fund-{n} for {random.choice(WORDS)} ventures",
+                "industry_sector": random.choice(SECTORS),
+            } for n in names]}
+        else:
+            names = sorted(set(_startup_name.findall(text)), key=int)
+            arguments = {"startups": [{
+                "CompanyName": f"Startup-{n}",
+                "WhatTheyDo": f"Builds {random.choice(WORDS)} tools for {random.choice(WORDS)}",
+                "Sector": random.choice(SECTORS),
+                "WebsiteSocialMedia": f"https://startup-{n}.example",
+                "YearFounded": 2015 + int(n) % 10,
+            } for n in names]}
+        message = {"role": "assistant", "content": None}
+        if function:
+            message["function_call"] = {"name": function, "arguments": json.dumps(arguments)}
+        else:
+            message["content"] = json.dumps(arguments)
+        prompt_tokens = len(text) // 4
+        response = {
+            "id": "chatcmpl-bench",
+            "object": "chat.completion",
+            "model": request.get("model"),
+            "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 200, "total_tokens": prompt_tokens + 200},
+        }
+        body = json.dumps(response).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_servers(pages, latency, hosts):
+    """Starts the site, PostgREST and chat servers; returns their base URLs and the URL lists."""
+    SiteHandler.corpus = make_corpus(pages)
+    ChatHandler.latency = latency
+    site_port = None
+    site_hosts = []
+    for i in range(hosts):
+        host = f"127.0.0.{i + 1}"
+        try:
+            server = _serve(SiteHandler, host, site_port or 0)
+        except OSError:
+            break  # Platforms without the whole 127/8 on loopback get fewer hosts
+        site_port = server.server_port
+        site_hosts.append(f"http://{host}:{site_port}")
+    rest = _serve(RestHandler)
+    chat = _serve(ChatHandler)
+    urls = {"startup": [], "grant": []}
+    for i, path in enumerate(sorted(SiteHandler.corpus)):
+        urls[path.split("/")[1]].append(site_hosts[i % len(site_hosts)] + path)
+    urls["startup"].append(site_hosts[0] + "/missing")
+    RestHandler.tables.update({
+        "startup_urls": [{"url": url} for url in urls["startup"]],
+        "grant_urls": [{"url": url} for url in urls["grant"]],
+        "startup": [],
+        "grant_programs": [],
+    })
+    return (f"http://127.0.0.1:{rest.server_port}", f"http://127.0.0.1:{chat.server_port}/v1",
+            len(site_hosts), urls)
+
+
+def run_child(profile, rest_url, openai_url, per_host_delay, tokens_per_minute):
+    """
+    Crawls one profile in this process against the local servers and
+    prints a JSON result line built from the run's telemetry metrics.
+    """
+    import openai
+
+    openai.api_base = openai_url
+    openai.api_key = "benchmark"
+    import fetcher
+    from llm_client import ChatClient
+    from pipeline import PROFILES, Pipeline, config
+    from supabase_client import SupabaseClient
+    from telemetry import configure_logging, metrics
+
+    configure_logging("WARNING")
+    fetcher.PER_HOST_DELAY = per_host_delay
+    chat_client = ChatClient(config.GPT_MODEL, tokens_per_minute=tokens_per_minute)
+    pipeline = Pipeline(PROFILES[profile], supabase=SupabaseClient(rest_url, "benchmark"), chat_client=chat_client)
+
+    started = time.perf_counter()
+    pipeline.crawl()
+    pipeline.close()
+    elapsed = time.perf_counter() - started
+
+    stages = {}
+    for stage, (name, labels) in STAGES.items():
+        histogram = metrics.histogram(name, **{k: v.format(table=PROFILES[profile].table) for k, v in labels.items()})
+        stages[stage] = {
+            "count": histogram.count if histogram else 0,
+            "p50": histogram.quantile(0.5) if histogram else 0.0,
+            "p99": histogram.quantile(0.99) if histogram else 0.0,
+        }
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    print(json.dumps({
+        "elapsed": elapsed,
+        "stages": stages,
+        "model_calls": chat_client.calls,
+        "peak_rss_mb": own / 1024,
+        "peak_parse_worker_rss_mb": children / 1024,
+        "metrics": metrics.summary()["counters"],
+    }))
+
+
+def run_profile(profile, rest_url, openai_url, url_count, args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [os.path.dirname(os.path.abspath(__file__)),
+                                                                     os.environ.get("PYTHONPATH")])))
+    with tempfile.TemporaryDirectory() as workdir:
+        # A fresh directory per run, so caches, crawl state and journals start empty
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", profile, rest_url, openai_url,
+             str(args.per_host_delay), str(args.tokens_per_minute)],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{profile} benchmark failed:\n{completed.stderr}")
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result["urls"] = url_count
+    result["urls_per_sec"] = url_count / result["elapsed"] if result["elapsed"] else 0.0
+    return result
+
+
+def report(results):
+    for profile, result in results.items():
+        print(f"\n{profile}: {result['urls']} URLs in {result['elapsed']:.1f}s "
+              f"({result['urls_per_sec']:.1f} URLs/sec), {result['model_calls']} model calls, "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB (parse workers {result['peak_parse_worker_rss_mb']:.0f} MB)")
+        for stage, stats in result["stages"].items():
+            print(f"  {stage:<15} n={stats['count']:<6} p50 {stats['p50'] * 1000:8.1f} ms"
+                  f"   p99 {stats['p99'] * 1000:8.1f} ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers against local stand-ins.")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help="synthetic pages per scraper")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY, help="fake model latency in seconds")
+    parser.add_argument("--hosts", type=int, default=DEFAULT_HOSTS, help="loopback hosts serving the corpus")
+    parser.add_argument("--per-host-delay", type=float, default=0.0, help="politeness delay per host in seconds")
+    parser.add_argument("--tokens-per-minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE,
+                        help="model token budget to emulate")
+    parser.add_argument("--only", choices=("grant", "startup"), help="benchmark a single profile")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    rest_url, openai_url, hosts, urls = start_servers(args.pages, args.latency, args.hosts)
+    print(f"Serving {len(SiteHandler.corpus)} pages on {hosts} hosts, model latency {args.latency}s")
+    results = {}
+    for profile in ([args.only] if args.only else ("startup", "grant")):
+        results[profile] = run_profile(profile, rest_url, openai_url, len(urls[profile]), args)
+    report(results)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 7 and sys.argv[1] == "--child":
+        run_child(sys.argv[2], sys.argv[3], sys.argv[4], float(sys.argv[5]), int(sys.argv[6]))
+    else:
+        main()
@@ -0,0 +1,125 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from telemetry import metrics
+
+CHUNK_TOKENS = 1500  # Page text per model call, leaves room for the prompt and a 1500-token answer
+CHUNK_OVERLAP_TOKENS = 100  # Shared between neighbouring chunks so entries on a boundary aren't cut in half
+MAX_CHUNKS_PER_PAGE = 10
+MAX_IN_FLIGHT = 8  # Concurrent model calls across all pages
+CHARS_PER_TOKEN = 4  # Estimate used when tiktoken isn't installed
+
+log = logging.getLogger(__name__)
+_encoders = {}
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_encoder(model):
+    if model not in _encoders:
+        try:
+            import tiktoken
+            _encoders[model] = tiktoken.encoding_for_model(model)
+        except ImportError:
+            _encoders[model] = None
+        except Exception as e:  # Unknown model, or the BPE file can't be downloaded
+            log.warning("tiktoken unavailable, estimating tokens", extra={"model": model, "error": str(e)})
+            _encoders[model] = None
+    return _encoders[model]
+
+
+def count_tokens(text, model="gpt-3.5-turbo"):
+    encoder = _get_encoder(model)
+    if encoder is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoder.encode(text))
+
+
+def chunk_text(text, max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+               max_chunks=MAX_CHUNKS_PER_PAGE, model="gpt-3.5-turbo"):
+    """
+    Splits `text` into at most `max_chunks` chunks of up to `max_tokens`
+    tokens, each starting `overlap_tokens` before the end of the previous one.
+    Uses tiktoken when installed, otherwise a characters-per-token estimate
+    with cuts moved back to the nearest space. Text past the last chunk is
+    dropped with a warning and counted in content_truncated_total.
+    """
+    if not text:
+        return []
+    step = max_tokens - overlap_tokens
+    encoder = _get_encoder(model)
+    chunks = []
+    if encoder is not None:
+        tokens = encoder.encode(text)
+        for start in range(0, len(tokens), step):
+            chunks.append(encoder.decode(tokens[start:start + max_tokens]))
+            if start + max_tokens >= len(tokens):
+                break
+            if len(chunks) == max_chunks:
+                _truncated(len(tokens) - start - max_tokens, "tokens")
+                break
+        return chunks
+
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    step_chars = step * CHARS_PER_TOKEN
+    start = 0
+    while True:
+        if len(chunks) == max_chunks:
+            _truncated(len(text) - start, "characters")
+            break
+        end = start + max_chars
+        if end < len(text):
+            space = text.rfind(" ", start + step_chars, end)
+            end = space if space != -1 else end
+        chunks.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        next_start = text.find(" ", end - (max_chars - step_chars), end)
+        start = next_start + 1 if next_start != -1 else end - (max_chars - step_chars)
+    return chunks
+
+
+def _get_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT)
+        return _pool
+
+
+def _truncated(dropped, unit):
+    metrics.inc("content_truncated_total", limit="max_chunks")
+    log.warning("Page text exceeds MAX_CHUNKS_PER_PAGE, dropping the rest",
+                extra={"max_chunks": MAX_CHUNKS_PER_PAGE, "dropped": dropped, "unit": unit})
+
+
+def map_chunks(extract_fn, chunks):
+    """
+    Runs `extract_fn` over every chunk on a shared pool capped at
+    MAX_IN_FLIGHT concurrent calls and returns the answers in chunk order.
+    """
+    if len(chunks) == 1:
+        return [extract_fn(chunks[0])]
+    return list(_get_pool().map(extract_fn, chunks))
+
+
+def merge_entries(entries, key_fields, empty_values=("", "Not defined", "Not specified")):
+    """
+    Collapses entries whose `key_fields` normalise to the same names (as in
+    dedup keys, so "Acme Sdn. Bhd." and "ACME" merge), keeping the first
+    meaningful value of every field. Order of first appearance is kept.
+    """
+    from dedup import normalize_name
+
+    merged = {}
+    for entry in entries:
+        key = tuple(normalize_name(entry.get(field)) for field in key_fields)
+        if key not in merged:
+            merged[key] = dict(entry)
+            continue
+        current = merged[key]
+        for field, value in entry.items():
+            if current.get(field) in empty_values or current.get(field) is None:
+                current[field] = value
+    return list(merged.values())
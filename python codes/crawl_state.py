@@ -0,0 +1,166 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+# Visit outcomes passed to CrawlStateStore.record_visit()
+CHANGED = "changed"
+UNCHANGED = "unchanged"
+FAILED = "failed"
+
+# Recrawl intervals in seconds: unchanged pages back off towards the maximum, changed ones come back sooner
+MIN_RECRAWL_INTERVAL = 6 * 3600
+DEFAULT_RECRAWL_INTERVAL = 24 * 3600
+MAX_RECRAWL_INTERVAL = 30 * 24 * 3600
+UNCHANGED_BACKOFF = 1.5
+CHANGED_SPEEDUP = 0.5
+# Failing pages are retried after MIN_RECRAWL_INTERVAL, doubling with every consecutive failure up to this
+MAX_FAILURE_INTERVAL = 60 * 24 * 3600
+# Pages due within this margin count as due, so a daily cron job started a bit early doesn't skip them
+SCHEDULE_SLACK = 3600
+
+_whitespace = re.compile(r"\s+")
+
+
+def fingerprint(text):
+    """Hash of the page text with whitespace normalised, so reflowed markup doesn't count as a change."""
+    return hashlib.sha1(_whitespace.sub(" ", text).strip().encode("utf-8")).hexdigest()
+
+
+def validators(result):
+    """The part of a scrape_website result that CrawlStateStore.record() keeps."""
+    return {key: result.get(key) for key in ("url", "etag", "last_modified", "final_url", "fingerprint")}
+
+
+class CrawlStateStore:
+    """
+    Per-URL validators from the last successfully processed crawl: ETag,
+    Last-Modified, the final URL after redirects and a fingerprint of the
+    extracted text. scrape_website uses them for conditional GETs and to
+    flag pages whose content hasn't changed. Each scraper keeps its own
+    store (see Profile.state_path): the same URL can be listed in both
+    startup_urls and grant_urls, and a shared store would have the second
+    scraper skip it as unchanged.
+
+    It also schedules recrawls: every visit's outcome updates the URL's
+    recrawl interval, change and failure counts, and due() lets through
+    only the URLs whose next visit has come.
+    """
+
+    def __init__(self, path):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " final_url TEXT,"
+            " fingerprint TEXT,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS schedule ("
+            " url TEXT PRIMARY KEY,"
+            " interval REAL NOT NULL,"
+            " next_due REAL NOT NULL,"
+            " visits INTEGER NOT NULL DEFAULT 0,"
+            " changes INTEGER NOT NULL DEFAULT 0,"
+            " failures INTEGER NOT NULL DEFAULT 0,"
+            " last_success REAL,"
+            " last_change REAL)"
+        )
+        self._db.commit()
+
+    def get(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT etag, last_modified, final_url, fingerprint FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"etag": row[0], "last_modified": row[1], "final_url": row[2], "fingerprint": row[3]}
+
+    def record(self, result):
+        """Stores the validators carried by a scrape_website result."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO pages (url, etag, last_modified, final_url, fingerprint, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (result["url"], result.get("etag"), result.get("last_modified"),
+                 result.get("final_url"), result.get("fingerprint"), time.time()),
+            )
+            self._db.commit()
+
+    def is_due(self, url, now=None):
+        """True for URLs never visited or whose next visit is at most SCHEDULE_SLACK away."""
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute("SELECT next_due FROM schedule WHERE url = ?", (url,)).fetchone()
+        return row is None or row[0] <= now + SCHEDULE_SLACK
+
+    def due(self, urls, now=None):
+        """Yields the URLs of `urls` that are due; lazy, like the URL iterators it wraps."""
+        now = time.time() if now is None else now
+        deferred = 0
+        for url in urls:
+            if self.is_due(url, now):
+                metrics.inc("schedule_urls_total", result="due")
+                yield url
+            else:
+                deferred += 1
+                metrics.inc("schedule_urls_total", result="deferred")
+        if deferred:
+            log.info("Skipped URLs not yet due for a recrawl", extra={"urls": deferred})
+
+    def record_visit(self, url, outcome, now=None):
+        """
+        Updates a URL's schedule after a visit with outcome CHANGED, UNCHANGED
+        or FAILED. Unchanged pages back off by UNCHANGED_BACKOFF up to
+        MAX_RECRAWL_INTERVAL and changed ones speed up by CHANGED_SPEEDUP down
+        to MIN_RECRAWL_INTERVAL; a first successful visit keeps the default.
+        Failures leave the interval alone and retry after an exponential
+        backoff on the failure streak, so dead pages fade out of the crawl.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._db.execute(
+                "SELECT interval, visits, changes, failures, last_success, last_change FROM schedule WHERE url = ?",
+                (url,),
+            ).fetchone()
+            interval, visits, changes, failures, last_success, last_change = (
+                row or (DEFAULT_RECRAWL_INTERVAL, 0, 0, 0, None, None)
+            )
+            visits += 1
+            if outcome == FAILED:
+                failures += 1
+                wait = min(MIN_RECRAWL_INTERVAL * 2 ** (failures - 1), MAX_FAILURE_INTERVAL)
+            else:
+                if outcome == CHANGED and last_success is not None:
+                    changes += 1
+                    last_change = now
+                    interval = max(interval * CHANGED_SPEEDUP, MIN_RECRAWL_INTERVAL)
+                elif outcome == UNCHANGED:
+                    interval = min(interval * UNCHANGED_BACKOFF, MAX_RECRAWL_INTERVAL)
+                failures = 0
+                last_success = now
+                wait = interval
+            self._db.execute(
+                "INSERT OR REPLACE INTO schedule"
+                " (url, interval, next_due, visits, changes, failures, last_success, last_change)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, interval, now + wait, visits, changes, failures, last_success, last_change),
+            )
+            self._db.commit()
+        metrics.inc("schedule_visits_total", outcome=outcome)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
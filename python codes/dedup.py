@@ -0,0 +1,138 @@
+import hashlib
+import json
+import logging
+import re
+import unicodedata
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from supabase_client import BatchWriter, SupabaseError
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+KEY_COLUMN = "dedup_key"
+HASH_COLUMN = "content_hash"
+
+# Query parameters that identify a visit rather than a page
+TRACKING_PARAMS = {"fbclid", "gclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "si"}
+# Legal-form suffixes dropped from company names, so "Acme Sdn. Bhd." and "ACME" share a key
+LEGAL_SUFFIXES = {"sdn", "bhd", "berhad", "plt", "pte", "ltd", "limited", "inc", "llc", "llp", "corp", "co"}
+PLACEHOLDERS = {"", "not defined", "not specified", "n/a", "na", "none", "unknown"}
+
+_non_word = re.compile(r"[^a-z0-9]+")
+
+
+def canonical_url(url):
+    """
+    Host and path of the first URL in `url`, lowercased, without scheme,
+    `www.`, default ports, fragment, trailing slash or tracking parameters.
+    Returns "" when there is no usable URL.
+    """
+    words = (url or "").split()
+    if not words or words[0].lower() in PLACEHOLDERS:
+        return ""
+    url = words[0].strip(",;()<>\"'").lower()
+    if "://" not in url:
+        url = "http://" + url
+    try:
+        parts = urlsplit(url)
+        host = parts.hostname or ""
+    except ValueError:
+        return ""
+    if "." not in host:
+        return ""
+    if host.startswith("www."):
+        host = host[4:]
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    )
+    canonical = host + parts.path.rstrip("/")
+    return f"{canonical}?{urlencode(query)}" if query else canonical
+
+
+def normalize_name(name):
+    """Lowercase ASCII words of a company or fund name, without punctuation or legal-form suffixes."""
+    text = unicodedata.normalize("NFKD", str(name or "")).encode("ascii", "ignore").decode("ascii").lower()
+    if text.strip() in PLACEHOLDERS:
+        return ""
+    words = _non_word.sub(" ", text).split()
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+def dedup_key(url, *names):
+    """Natural key of a row: canonical website plus normalised names, e.g. "acme.com|acme|seed fund"."""
+    return "|".join([canonical_url(url)] + [normalize_name(name) for name in names])
+
+
+def content_hash(row, exclude=("No", KEY_COLUMN, HASH_COLUMN)):
+    """Hash of a row's values (ignoring generated columns), to tell whether a stored record changed."""
+    values = {key: value for key, value in row.items() if key not in exclude}
+    return hashlib.sha1(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def load_key_index(client, table, extra_columns=()):
+    """
+    Reads the dedup key, content hash and `extra_columns` of every keyed row
+    in `table` into a dict keyed by dedup key. Called once per run.
+    """
+    columns = ",".join((KEY_COLUMN, HASH_COLUMN) + tuple(extra_columns))
+    index = {}
+    try:
+        for row in client.select_pages(table, key=KEY_COLUMN, columns=columns,
+                                       filters={KEY_COLUMN: "not.is.null"}):
+            index[row[KEY_COLUMN]] = row
+    except SupabaseError as e:
+        log.error("Failed to load dedup keys", extra={"table": table, "status": e.status_code, "error": e.text})
+    except Exception as e:
+        log.error("Error loading dedup keys", extra={"table": table, "error": str(e)})
+    log.info("Loaded existing dedup keys", extra={"table": table, "keys": len(index)})
+    return index
+
+
+class UpsertWriter(BatchWriter):
+    """
+    BatchWriter that upserts on the `dedup_key` column: every row gets its
+    natural key from `key_fn` and a content hash, rows identical to what the
+    table already holds are skipped, and changed ones are merged into the
+    existing record instead of appended. With a `resolver`
+    (entity_resolution.EntityResolver) each row is first replaced by the
+    merged entry of its near-duplicate cluster, so variants of one company
+    update a single record; the resolver is seeded with the table's stored
+    records, so that also holds across runs. Subclasses fill in generated
+    columns from the stored row in prepare().
+    """
+
+    def __init__(self, client, table, key_fn, batch_size, on_flush=None, extra_columns=(), resolver=None):
+        super().__init__(client, table, batch_size, on_flush, on_conflict=KEY_COLUMN)
+        self.key_fn = key_fn
+        self.resolver = resolver
+        columns = tuple(extra_columns) + (resolver.fields if resolver is not None else ())
+        self.index = load_key_index(client, table, tuple(dict.fromkeys(columns)))
+        if resolver is not None:
+            for key, row in self.index.items():
+                resolver.seed(row, key)
+        self.skipped = 0
+
+    def prepare(self, row, existing):
+        return row
+
+    def add(self, row):
+        if self.resolver is not None:
+            # Back onto the row's own columns: PostgREST needs the same keys on every row of a batch
+            merged = self.resolver.add(row)
+            row = {field: merged.get(field, value) for field, value in row.items()}
+        key = self.key_fn(row)
+        digest = content_hash(row)
+        existing = self.index.get(key)
+        if existing is not None and existing.get(HASH_COLUMN) == digest:
+            self.skipped += 1
+            metrics.inc("db_rows_total", table=self.table, result="skipped")
+            return
+        row = self.prepare(row, existing)
+        row[KEY_COLUMN] = key
+        row[HASH_COLUMN] = digest
+        self.index[key] = row
+        super().add(row)
@@ -0,0 +1,234 @@
+import hashlib
+import operator
+import struct
+
+from dedup import PLACEHOLDERS, canonical_url, normalize_name
+
+NUM_PERM = 64  # MinHash signature length
+BANDS = 16  # LSH bands of NUM_PERM // BANDS rows; candidates above ~0.5 Jaccard share a band
+SIMILARITY_THRESHOLD = 0.5  # Estimated Jaccard over name, website and description shingles
+NAME_CONTAINMENT = 0.8  # Share of the shorter name's trigrams the other name must contain
+MAX_BUCKET = 100  # Members kept per LSH bucket, so a very common band can't make lookups linear
+
+# Hosts where a company's page is a profile, not its own site: a different website there doesn't rule a match out
+SOCIAL_HOSTS = ("facebook.com", "instagram.com", "linkedin.com", "twitter.com", "x.com", "tiktok.com", "youtube.com")
+
+# Each blake2b digest gives 8 independent 64-bit hash values; NUM_PERM of them need NUM_PERM // 8 salts
+_SALTS = [i.to_bytes(16, "little") for i in range(NUM_PERM // 8)]
+_unpack = struct.Struct("<8Q").unpack
+
+
+def _hashes(token):
+    data = token.encode("utf-8")
+    values = ()
+    for salt in _SALTS:
+        values += _unpack(hashlib.blake2b(data, digest_size=64, salt=salt).digest())
+    return values
+
+
+def _trigrams(text):
+    text = f" {text} "
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _words(value):
+    return normalize_name(value).split()
+
+
+def shingles(names, websites, descriptions):
+    """
+    Token set of one record: character trigrams of the names, the canonical
+    websites, and word bigrams of the descriptions, each kind prefixed so
+    they never collide.
+    """
+    tokens = set()
+    for name in names:
+        tokens.update("n:" + gram for gram in _trigrams(normalize_name(name)))
+    for website in websites:
+        url = canonical_url(website)
+        if url:
+            tokens.add("w:" + url)
+    for description in descriptions:
+        words = _words(description)
+        tokens.update(f"d:{a} {b}" for a, b in zip(words, words[1:]))
+        if len(words) == 1:
+            tokens.add("d:" + words[0])
+    return tokens
+
+
+def minhash(tokens):
+    """MinHash signature of a token set: per hash function, the minimum over the tokens."""
+    if not tokens:
+        return (0,) * NUM_PERM
+    return tuple(map(min, zip(*map(_hashes, tokens))))
+
+
+def similarity(left, right):
+    """Jaccard similarity estimated from two MinHash signatures."""
+    return sum(map(operator.eq, left, right)) / NUM_PERM
+
+
+def _site(value):
+    url = canonical_url(value)
+    host = url.split("/", 1)[0]
+    if any(host == social or host.endswith("." + social) for social in SOCIAL_HOSTS):
+        return ""
+    return url
+
+
+def name_containment(left, right):
+    left, right = _trigrams(normalize_name(left)), _trigrams(normalize_name(right))
+    smaller = min(len(left), len(right))
+    return len(left & right) / smaller if smaller else 0.0
+
+
+class EntityResolver:
+    """
+    Clusters near-duplicate entries (the same company listed on several pages
+    with slightly different names or descriptions) in a MinHash LSH index, so
+    each new entry is only compared with the few entries sharing a band
+    instead of with every entry seen so far.
+
+    add() returns the merged entry of the cluster the entry joined. Merging
+    is field by field: `key_fields` keep the cluster's first meaningful value
+    so its dedup key stays stable, other fields take the longest meaningful
+    value. Entries for which `exclude(entry)` is true pass through unchanged.
+
+    With a `key_fn` (the writer's dedup key) an entry whose key is already
+    in a cluster joins that cluster before LSH is consulted, since a banded
+    index can miss even identical keys when the descriptions differ. seed()
+    adds records stored by earlier runs, so this run's variants of them
+    update the stored record instead of starting a new cluster.
+    """
+
+    def __init__(self, name_fields, website_fields, description_fields, key_fields=None, key_fn=None,
+                 exclude=None, threshold=SIMILARITY_THRESHOLD, empty_values=PLACEHOLDERS):
+        self.name_fields = tuple(name_fields)
+        self.website_fields = tuple(website_fields)
+        self.description_fields = tuple(description_fields)
+        self.key_fields = set(key_fields or self.name_fields + self.website_fields)
+        self.key_fn = key_fn
+        self.exclude = exclude
+        self.threshold = threshold
+        self.empty_values = empty_values
+        self.rows = NUM_PERM // BANDS
+        self.buckets = {}
+        self.signatures = []
+        self.identities = []
+        self.cluster_of = []
+        self.clusters = []
+        self.cluster_by_key = {}
+        self.merged = 0
+
+    @property
+    def fields(self):
+        """Every field the resolver reads, e.g. the columns to load for seed()."""
+        return tuple(dict.fromkeys(self.name_fields + self.website_fields + self.description_fields))
+
+    def _empty(self, value):
+        return value is None or str(value).strip().lower() in self.empty_values
+
+    def _compatible(self, left, right):
+        for field in self.website_fields:
+            a, b = _site(left.get(field)), _site(right.get(field))
+            if a and b and a != b:
+                return False
+        for field in self.name_fields:
+            a, b = left.get(field), right.get(field)
+            if self._empty(a) or self._empty(b):
+                continue
+            if name_containment(a, b) < NAME_CONTAINMENT:
+                return False
+        return True
+
+    def _bands(self, signature):
+        for band in range(BANDS):
+            yield band, signature[band * self.rows:(band + 1) * self.rows]
+
+    def _find(self, signature, entry):
+        candidates = set()
+        for key in self._bands(signature):
+            candidates.update(self.buckets.get(key, ()))
+        best, best_score = None, self.threshold
+        for member in candidates:
+            score = similarity(signature, self.signatures[member])
+            if score >= best_score and self._compatible(entry, self.identities[member]):
+                best, best_score = member, score
+        return None if best is None else self.cluster_of[best]
+
+    def _merge(self, current, entry):
+        for field, value in entry.items():
+            if self._empty(value):
+                continue
+            existing = current.get(field)
+            if self._empty(existing):
+                current[field] = value
+            elif field not in self.key_fields and isinstance(value, str) and len(value) > len(str(existing)):
+                current[field] = value
+
+    def _signature(self, entry):
+        return minhash(shingles(
+            [entry.get(field) for field in self.name_fields],
+            [entry.get(field) for field in self.website_fields],
+            [entry.get(field) for field in self.description_fields],
+        ))
+
+    def _key(self, entry):
+        if self.key_fn is None:
+            return None
+        key = self.key_fn(entry)
+        # A key without any website or name part ("|") says nothing about identity
+        return key if key and key.strip("|") else None
+
+    def seed(self, entry, key=None):
+        """
+        Adds a stored record as its own cluster. The cluster starts with
+        only the record's key fields, so entries that join it keep the
+        stored dedup key while their other fields replace the stored ones.
+        """
+        if self.exclude is not None and self.exclude(entry):
+            return
+        cluster = len(self.clusters)
+        self.clusters.append({field: entry.get(field) for field in self.key_fields if field in entry})
+        for known in (key, self._key(entry)):
+            if known is not None:
+                self.cluster_by_key.setdefault(known, cluster)
+        self._index(self._signature(entry), entry, cluster)
+
+    def add(self, entry):
+        if self.exclude is not None and self.exclude(entry):
+            return entry
+        signature = self._signature(entry)
+        key = self._key(entry)
+        cluster = self.cluster_by_key.get(key)
+        if cluster is None:
+            cluster = self._find(signature, entry)
+        if cluster is None:
+            cluster = len(self.clusters)
+            self.clusters.append(dict(entry))
+        else:
+            self.merged += 1
+            self._merge(self.clusters[cluster], entry)
+        for known in (key, self._key(self.clusters[cluster])):
+            if known is not None:
+                self.cluster_by_key.setdefault(known, cluster)
+        self._index(signature, entry, cluster)
+        return self.clusters[cluster]
+
+    def _index(self, signature, entry, cluster):
+        member = len(self.signatures)
+        self.signatures.append(signature)
+        self.identities.append({field: entry.get(field) for field in self.name_fields + self.website_fields})
+        self.cluster_of.append(cluster)
+        for key in self._bands(signature):
+            bucket = self.buckets.setdefault(key, [])
+            if len(bucket) < MAX_BUCKET:
+                bucket.append(member)
+
+    def resolve(self, entries):
+        """Offline use: the merged entries of all clusters, in order of first appearance."""
+        seen = {}
+        for entry in entries:
+            merged = self.add(entry)
+            seen.setdefault(id(merged), merged)
+        return list(seen.values())
@@ -0,0 +1,118 @@
+import json
+import logging
+import re
+
+from response_parser import GRANT_FIELDS, STARTUP_FIELDS
+
+log = logging.getLogger(__name__)
+_year = re.compile(r"\b(1[89]\d\d|20\d\d)\b")
+_integer = re.compile(r"-?\d+")
+
+
+def build_function(name, description, list_key, fields, integer_fields=(), required=(), descriptions=None):
+    """
+    Builds an OpenAI function definition whose single argument `list_key`
+    is an array of objects with one property per field.
+    """
+    descriptions = descriptions or {}
+    properties = {}
+    for field in fields:
+        prop = {"type": "integer" if field in integer_fields else "string"}
+        if field in descriptions:
+            prop["description"] = descriptions[field]
+        properties[field] = prop
+    return {
+        "name": name,
+        "description": description,
+        "parameters": {
+            "type": "object",
+            "properties": {
+                list_key: {
+                    "type": "array",
+                    "items": {"type": "object", "properties": properties, "required": list(required)}
+                }
+            },
+            "required": [list_key]
+        }
+    }
+
+
+STARTUP_FUNCTION = build_function(
+    "record_startups",
+    "Record every startup, company or entrepreneurial venture described in the page text.",
+    "startups",
+    [field for field in STARTUP_FIELDS if field != "No"],
+    integer_fields=("YearFounded",),
+    required=("CompanyName",),
+    descriptions={
+        "WhatTheyDo": "One sentence on the product or service",
+        "Grants": "Grants or funding received, with amounts and funders",
+        "MaGICAccredited": "Yes or No",
+        "WebsiteSocialMedia": "Website or social media URL",
+        "YearFounded": "Four-digit year"
+    }
+)
+
+GRANT_FUNCTION = build_function(
+    "record_grant_programs",
+    "Record every grant programme, fund or financial support initiative described in the page text.",
+    "programs",
+    GRANT_FIELDS,
+    required=("company_name",),
+    descriptions={
+        "company_name": "Organisation offering the programme; may be taken from the website link",
+        "fund_name": "Name of the specific fund or programme",
+        "program_participation": "Eligibility, amounts and how to take part"
+    }
+)
+
+
+def _coerce(value, schema_type):
+    if value is None:
+        return None
+    if schema_type == "integer":
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value
+        if isinstance(value, float):
+            return int(value)
+        text = str(value)
+        match = _year.search(text) or _integer.search(text)
+        return int(match.group(0)) if match else None
+    if isinstance(value, (list, tuple)):
+        return ", ".join(str(v).strip() for v in value if v is not None)
+    return str(value).strip()
+
+
+def parse_arguments(arguments, function):
+    """
+    Validates the JSON arguments of a function call against `function` in one
+    pass: unknown keys are dropped, values coerced to the declared types and
+    items missing a required field skipped. Returns a list of dicts.
+    """
+    try:
+        payload = json.loads(arguments)
+    except (TypeError, ValueError) as e:
+        log.warning("Invalid JSON from model", extra={"error": str(e)})
+        return []
+    list_key, list_schema = next(iter(function["parameters"]["properties"].items()))
+    items = payload.get(list_key) if isinstance(payload, dict) else payload
+    if isinstance(items, dict):
+        items = [items]
+    if not isinstance(items, list):
+        return []
+    properties = list_schema["items"]["properties"]
+    required = list_schema["items"]["required"]
+    entries = []
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        entry = {}
+        for field, prop in properties.items():
+            value = _coerce(item.get(field), prop["type"])
+            if value is not None and value != "":
+                entry[field] = value
+        if all(field in entry for field in required):
+            entries.append(entry)
+    return entries
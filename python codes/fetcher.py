@@ -0,0 +1,352 @@
+import heapq
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+from urllib.parse import urlparse
+
+import requests
+
+from crawl_state import fingerprint
+from html_text import extract_text
+from telemetry import metrics
+
+headers = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+}
+
+# Global cap on fetches in flight and minimum gap between two requests to the same host
+MAX_CONCURRENT_FETCHES = 100
+PER_HOST_DELAY = 2.0
+# URLs held back while their host's next slot is in the future; past this, reading more URLs pauses
+MAX_DEFERRED_URLS = 10000
+REQUEST_TIMEOUT = 10
+# Bodies are read in a stream and cut off past this many bytes
+MAX_DOWNLOAD_BYTES = 2 * 1024 * 1024
+SNIPPET_CHARS = 2000  # Short preview kept for callers that send a single snippet to GPT
+MAX_CONTENT_CHARS = 60000  # Full cleaned text handed to the chunked extraction
+
+log = logging.getLogger(__name__)
+_local = threading.local()
+
+
+def _get_session():
+    """Returns a requests.Session owned by the current worker thread."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        session.headers.update(headers)
+        _local.session = session
+    return session
+
+
+def _host(url):
+    return urlparse(url).netloc.lower()
+
+
+class HostThrottle:
+    """
+    Spaces out requests to the same host by at least `delay` seconds.
+    wait() sleeps until the host's slot; try_acquire() is the non-blocking
+    form scrape_many uses, so no worker thread is parked on a busy host.
+    """
+
+    def __init__(self, delay=PER_HOST_DELAY):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def try_acquire(self, url):
+        """Takes the host's slot and returns 0 if it has come, otherwise returns the seconds left."""
+        host = _host(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = self._next_slot.get(host, now)
+            if slot > now:
+                return slot - now
+            self._next_slot[host] = now + self.delay
+            return 0
+
+    def wait(self, url):
+        host = _host(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def read_body(response, limit=None):
+    """Reads a streamed response body up to `limit` (default MAX_DOWNLOAD_BYTES) bytes."""
+    limit = limit or MAX_DOWNLOAD_BYTES
+    chunks = []
+    size = 0
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= limit:
+            break
+    response.close()
+    return b"".join(chunks)[:limit]
+
+
+def fetch_page(url, throttle=None, state=None, archive=None):
+    """
+    Network half of scrape_website. Returns a raw page dict (body bytes plus
+    response validators) for parse_page, {"url", "unchanged": True} for a
+    304, or None on failure. When a CrawlStateStore is passed the stored
+    ETag/Last-Modified are sent as a conditional GET. With a
+    page_archive.PageArchive every page fetched is also archived.
+    """
+    previous = state.get(url) if state is not None else None
+    request_headers = {}
+    if previous:
+        if previous["etag"]:
+            request_headers["If-None-Match"] = previous["etag"]
+        if previous["last_modified"]:
+            request_headers["If-Modified-Since"] = previous["last_modified"]
+    if throttle is not None:
+        throttle.wait(url)
+    log.debug("Scraping", extra={"url": url})
+    started = time.perf_counter()
+    try:
+        response = _get_session().get(url, headers=request_headers, timeout=REQUEST_TIMEOUT, stream=True)
+        metrics.inc("fetch_responses_total", status=response.status_code)
+        if response.status_code != 200:
+            response.close()
+        if response.status_code == 304:
+            log.debug("Not modified (304)", extra={"url": url})
+            return {"url": url, "unchanged": True}
+        if response.status_code == 200:
+            body = read_body(response)
+            metrics.inc("fetch_bytes_total", len(body))
+            if archive is not None:
+                try:
+                    archive.write(url, response.status_code, response.headers, body, response.url)
+                except OSError as e:
+                    log.warning("Failed to archive page", extra={"url": url, "error": str(e)})
+            return {
+                "url": url,
+                "body": body,
+                "encoding": response.encoding,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "final_url": response.url,
+                "previous_fingerprint": previous["fingerprint"] if previous else None
+            }
+        elif response.status_code == 404:
+            log.warning("Page not found (404)", extra={"url": url})
+        elif response.status_code == 403:
+            log.warning("Forbidden (403), access denied", extra={"url": url})
+        else:
+            log.warning("Failed to retrieve page", extra={"url": url, "status": response.status_code})
+    except requests.exceptions.RequestException as e:
+        metrics.inc("fetch_responses_total", status="error")
+        log.warning("Error fetching page", extra={"url": url, "error": str(e)})
+    finally:
+        metrics.observe("fetch_seconds", time.perf_counter() - started)
+    return None
+
+
+def decode_body(body, encoding):
+    """Decodes a page body with its declared charset, falling back to UTF-8 for charsets Python doesn't know."""
+    try:
+        return body.decode(encoding or "utf-8", errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def parse_page(raw):
+    """
+    CPU half of scrape_website: turns a fetch_page dict into the compact
+    {"url", "title", "content_snippet", "content", ...} result, or None when
+    the HTML can't be parsed. Takes and returns only plain data so it can
+    run in a worker process.
+    """
+    if raw is None or raw.get("unchanged"):
+        return raw
+    url = raw["url"]
+    html = decode_body(raw["body"], raw["encoding"])
+    try:
+        title, body_text = extract_text(html)
+    except Exception as e:  # e.g. lxml's "Document is empty" for comment-only bodies
+        log.warning("Failed to parse page", extra={"url": url, "error": str(e)})
+        return None
+    title = title or "No Title"
+    page_fingerprint = fingerprint(body_text)
+    if raw["previous_fingerprint"] == page_fingerprint:
+        log.debug("Content unchanged", extra={"url": url})
+        # The validators may have changed even though the text hasn't; the caller records them
+        return {"url": url, "unchanged": True, "etag": raw["etag"], "last_modified": raw["last_modified"],
+                "final_url": raw["final_url"], "fingerprint": page_fingerprint}
+    log.debug("Parsed page", extra={"url": url, "title": title, "chars": len(body_text)})
+    # Logged and counted by the caller: this may run in a worker process
+    return {
+        "url": url,
+        "title": title,
+        "content_snippet": body_text[:SNIPPET_CHARS],
+        "content": body_text[:MAX_CONTENT_CHARS],
+        "etag": raw["etag"],
+        "last_modified": raw["last_modified"],
+        "final_url": raw["final_url"],
+        "fingerprint": page_fingerprint,
+        "truncated_chars": max(len(body_text) - MAX_CONTENT_CHARS, 0)
+    }
+
+
+def scrape_website(url, throttle=None, state=None, archive=None, replay=False):
+    """
+    Fetches and parses one page. When a CrawlStateStore is passed, sends a
+    conditional GET with the stored validators and returns
+    {"url", "unchanged": True} for a 304 or an identical text fingerprint;
+    the latter also carries the response's validators, which can change
+    while the text stays the same. Fresh results carry the new validators so the caller can record them
+    once the page has been fully processed. With a PageArchive the page is
+    archived, or with replay=True read from the archive instead of fetched.
+    """
+    raw = archive.fetch_page(url, state=state) if replay else fetch_page(url, throttle, state, archive)
+    result, seconds = _timed_parse(raw)
+    if seconds is not None:
+        _record_parse(result, seconds)
+    return result
+
+
+def _record_parse(result, seconds):
+    metrics.observe("parse_seconds", seconds)
+    if result and result.get("truncated_chars"):
+        metrics.inc("content_truncated_total", limit="max_content_chars")
+        log.warning("Page text exceeds MAX_CONTENT_CHARS, dropping the rest",
+                    extra={"url": result["url"], "dropped": result["truncated_chars"]})
+
+
+def _timed_parse(raw):
+    """parse_page plus its duration (None when there was nothing to parse), for the parse_seconds histogram."""
+    if raw is None or raw.get("unchanged"):
+        return raw, None
+    started = time.perf_counter()
+    result = parse_page(raw)
+    return result, time.perf_counter() - started
+
+
+def scrape_many(urls, max_concurrency=MAX_CONCURRENT_FETCHES, per_host_delay=None, state=None,
+                parse_workers=None, archive=None, replay=False):
+    """
+    Scrapes `urls` and yields (url, result) pairs as they finish, where
+    `result` is the scrape_website dict or None. `urls` is consumed lazily,
+    so it may be a generator.
+
+    Fetches run on a thread pool with at most `max_concurrency` in flight.
+    A URL whose host was requested less than `per_host_delay` seconds ago
+    waits in that host's queue (up to MAX_DEFERRED_URLS in all) instead of
+    taking a fetch slot, so a long run of one host's URLs, as the keyset
+    order of the URL tables produces, doesn't hold up the other hosts.
+    HTML parsing runs on a process pool of `parse_workers` processes (default:
+    one per core, 0 parses inline in the fetch threads). Raw pages waiting
+    for a parser count against the fetch cap and at most two parse jobs per
+    worker are queued, so a slow consumer throttles both stages instead of
+    letting pages pile up in memory.
+    `state` is an optional CrawlStateStore enabling conditional re-crawls.
+    `archive` is an optional PageArchive that fetched pages are written to;
+    with replay=True pages are read from it instead, without any network
+    access or per-host delay.
+    """
+    if parse_workers is None:
+        parse_workers = os.cpu_count() or 1
+    if replay:
+        per_host_delay = 0
+    throttle = HostThrottle(PER_HOST_DELAY if per_host_delay is None else per_host_delay)
+    url_iter = iter(urls)
+    fetching = {}
+    parsing = {}
+    fetched = deque()
+    deferred = {}  # Host -> its URLs waiting for the next slot
+    ready = []  # Heap of (when the host's next slot comes, host), one entry per host in `deferred`
+    deferred_count = 0
+    urls_left = True
+
+    fetch_pool = ThreadPoolExecutor(max_workers=max_concurrency)
+    parse_pool = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers else None
+    if parse_pool is None:
+        fetch_job = partial(scrape_website, archive=archive, replay=replay)
+    elif replay:
+        fetch_job = archive.fetch_page
+    else:
+        fetch_job = partial(fetch_page, archive=archive)
+    try:
+        while True:
+            # Deferred URLs whose host slot has come go first, then new ones
+            while ready and ready[0][0] <= time.monotonic() and len(fetching) + len(fetched) < max_concurrency:
+                _, host = heapq.heappop(ready)
+                queue = deferred[host]
+                left = throttle.try_acquire(queue[0])
+                if left:
+                    heapq.heappush(ready, (time.monotonic() + left, host))
+                    continue
+                url = queue.popleft()
+                deferred_count -= 1
+                fetching[fetch_pool.submit(fetch_job, url, None, state)] = url
+                if queue:
+                    heapq.heappush(ready, (time.monotonic() + throttle.delay, host))
+                else:
+                    del deferred[host]
+            while urls_left and len(fetching) + len(fetched) < max_concurrency and deferred_count < MAX_DEFERRED_URLS:
+                url = next(url_iter, None)
+                if url is None:
+                    urls_left = False
+                    break
+                host = _host(url)
+                if host in deferred:
+                    deferred[host].append(url)
+                    deferred_count += 1
+                    continue
+                left = throttle.try_acquire(url)
+                if left:
+                    deferred[host] = deque([url])
+                    deferred_count += 1
+                    heapq.heappush(ready, (time.monotonic() + left, host))
+                    continue
+                fetching[fetch_pool.submit(fetch_job, url, None, state)] = url
+            while fetched and len(parsing) < 2 * parse_workers:
+                raw = fetched.popleft()
+                # Timed in the worker: metrics recorded there would stay in that process
+                parsing[parse_pool.submit(_timed_parse, raw)] = raw["url"]
+            timeout = max(ready[0][0] - time.monotonic(), 0) if ready else None
+            if not fetching and not parsing:
+                if fetched:
+                    continue
+                if not ready:
+                    return
+                time.sleep(timeout)
+                continue
+
+            done, _ = wait(list(fetching) + list(parsing), timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                # A page whose job raised counts as failed instead of ending the crawl
+                if future in parsing:
+                    url = parsing.pop(future)
+                    try:
+                        result, seconds = future.result()
+                        _record_parse(result, seconds)
+                    except Exception as e:
+                        log.warning("Error parsing page", extra={"url": url, "error": str(e)})
+                        result = None
+                    yield url, result
+                    continue
+                url = fetching.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    log.warning("Error scraping page", extra={"url": url, "error": str(e)})
+                    result = None
+                if parse_pool is None or result is None or result.get("unchanged"):
+                    yield url, result
+                else:
+                    fetched.append(result)
+    finally:
+        fetch_pool.shutdown(wait=True, cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown(wait=True, cancel_futures=True)
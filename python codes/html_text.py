@@ -0,0 +1,93 @@
+import re
+
+# Elements that never hold content worth sending to GPT
+BOILERPLATE_TAGS = ("script", "style", "noscript", "template", "svg", "iframe", "nav", "header", "footer", "aside", "form")
+
+_whitespace = re.compile(r"\s+")
+# lxml refuses str input that still declares an encoding, e.g. XHTML's <?xml version="1.0" encoding="utf-8"?>
+_xml_declaration = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def _collapse(text):
+    return _whitespace.sub(" ", text).strip()
+
+
+def _extract_selectolax(html):
+    from selectolax.lexbor import LexborHTMLParser
+
+    tree = LexborHTMLParser(html)
+    title_node = tree.css_first("title")
+    title = title_node.text(strip=True) if title_node else ""
+    tree.strip_tags(list(BOILERPLATE_TAGS))
+    root = tree.body or tree.root
+    return title, root.text(separator=" ") if root else ""
+
+
+def _extract_lxml(html):
+    import lxml.html
+    from lxml import etree
+
+    html = _xml_declaration.sub("", html, count=1)
+    if not html.strip():
+        return "", ""
+    try:
+        tree = lxml.html.document_fromstring(html)
+    except etree.ParserError:  # "Document is empty", e.g. a body of only comments
+        return "", ""
+    title = tree.findtext(".//title") or ""
+    etree.strip_elements(tree, etree.Comment, *BOILERPLATE_TAGS, with_tail=False)
+    body = tree.find("body")
+    root = body if body is not None else tree
+    return title.strip(), " ".join(root.itertext())
+
+
+def _extract_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    title = soup.title.string.strip() if soup.title and soup.title.string else ""
+    for tag in soup(BOILERPLATE_TAGS):
+        tag.decompose()
+    root = soup.body or soup
+    return title, root.get_text(" ")
+
+
+# Fastest first; the first one whose parser is importable wins
+BACKENDS = {
+    "selectolax": ("selectolax.lexbor", _extract_selectolax),
+    "lxml": ("lxml.html", _extract_lxml),
+    "html.parser": ("bs4", _extract_bs4),
+}
+
+_backend = None
+
+
+def get_backend(name=None):
+    """Returns (name, extractor) for `name`, or for the fastest installed backend."""
+    global _backend
+    if name is not None:
+        return name, BACKENDS[name][1]
+    if _backend is None:
+        import importlib
+
+        for candidate, (module, extractor) in BACKENDS.items():
+            try:
+                importlib.import_module(module)
+            except ImportError:
+                continue
+            _backend = (candidate, extractor)
+            break
+        else:
+            raise ImportError("No HTML parser available; install selectolax, lxml or beautifulsoup4")
+    return _backend
+
+
+def extract_text(html, backend=None):
+    """
+    Returns (title, text) for an HTML document with script/style and page
+    chrome (nav, header, footer, ...) removed and whitespace collapsed, so a
+    truncated prefix of `text` is actual page content.
+    """
+    _, extractor = get_backend(backend)
+    title, text = extractor(html)
+    return _collapse(title), _collapse(text)
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+
+import openai
+
+from chunking import count_tokens
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+MAX_CONCURRENT_REQUESTS = 8
+TOKENS_PER_MINUTE = 90000  # Account limit for the model; prompt + max_tokens is reserved per call
+MAX_RETRIES = 6
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIError,
+    openai.error.APIConnectionError,
+    openai.error.ServiceUnavailableError,
+    openai.error.Timeout,
+    openai.error.TryAgain,
+)
+
+
+class TokenBucket:
+    """Token-per-minute budget: callers wait until enough of the budget has refilled."""
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.tokens = tokens_per_minute
+        self.rate = tokens_per_minute / 60.0
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount):
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def refund(self, amount):
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+def _retry_after(error):
+    headers = getattr(error, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ChatClient:
+    """
+    Async chat-completion client on a private event loop thread. Caps the
+    number of requests in flight, keeps within a tokens-per-minute budget,
+    retries rate limits and server errors with exponential backoff (waiting
+    for Retry-After when the API sends it) and records latency and token
+    usage per call. Threaded code calls complete_sync().
+    """
+
+    def __init__(self, model, max_concurrency=MAX_CONCURRENT_REQUESTS,
+                 tokens_per_minute=TOKENS_PER_MINUTE, max_retries=MAX_RETRIES):
+        self.model = model
+        self.max_retries = max_retries
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies = []
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, daemon=True).start()
+        self._semaphore = None
+        self._bucket = None
+        self._setup(max_concurrency, tokens_per_minute)
+
+    def _setup(self, max_concurrency, tokens_per_minute):
+        async def create():
+            self._semaphore = asyncio.Semaphore(max_concurrency)
+            self._bucket = TokenBucket(tokens_per_minute)
+        asyncio.run_coroutine_threadsafe(create(), self._loop).result()
+
+    async def complete(self, messages, max_tokens, temperature, functions=None):
+        """
+        Returns the stripped completion text, or the JSON arguments string when
+        `functions` is given and the model calls the first one. Raises after
+        the last failed retry.
+        """
+        reserved = sum(count_tokens(m["content"], self.model) for m in messages) + max_tokens
+        extra = {}
+        if functions:
+            reserved += count_tokens(json.dumps(functions), self.model)
+            extra = {"functions": functions, "function_call": {"name": functions[0]["name"]}}
+        for attempt in range(self.max_retries + 1):
+            await self._bucket.acquire(reserved)
+            async with self._semaphore:
+                started = time.monotonic()
+                try:
+                    response = await openai.ChatCompletion.acreate(
+                        model=self.model,
+                        messages=messages,
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **extra
+                    )
+                except RETRYABLE_ERRORS as e:
+                    metrics.inc("model_errors_total", error=type(e).__name__)
+                    if attempt == self.max_retries:
+                        self.failures += 1
+                        metrics.inc("model_failures_total")
+                        raise
+                    self.retries += 1
+                    metrics.inc("model_retries_total")
+                    delay = _retry_after(e) or min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt)
+                    log.warning("OpenAI error, retrying",
+                                extra={"error": type(e).__name__, "delay": round(delay, 1), "attempt": attempt + 1})
+                else:
+                    latency = time.monotonic() - started
+                    self.latencies.append(latency)
+                    self.calls += 1
+                    metrics.observe("model_call_seconds", latency)
+                    usage = response.get("usage") or {}
+                    self.prompt_tokens += usage.get("prompt_tokens", 0)
+                    self.completion_tokens += usage.get("completion_tokens", 0)
+                    metrics.inc("model_tokens_total", usage.get("prompt_tokens", 0), kind="prompt")
+                    metrics.inc("model_tokens_total", usage.get("completion_tokens", 0), kind="completion")
+                    if usage:
+                        self._bucket.refund(max(0, reserved - usage.get("total_tokens", reserved)))
+                    message = response['choices'][0]['message']
+                    if message.get("function_call"):
+                        return message["function_call"]["arguments"]
+                    return (message.get("content") or "").strip()
+            await asyncio.sleep(delay * (1 + random.random() * 0.1))
+
+    def complete_sync(self, messages, max_tokens, temperature, functions=None):
+        return asyncio.run_coroutine_threadsafe(
+            self.complete(messages, max_tokens, temperature, functions), self._loop
+        ).result()
+
+    def stats(self):
+        latencies = sorted(self.latencies)
+        p50 = latencies[len(latencies) // 2] if latencies else 0
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] if latencies else 0
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "latency_p50": round(p50, 2),
+            "latency_p99": round(p99, 2),
+        }
@@ -0,0 +1,252 @@
+import glob
+import gzip
+import http
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+INDEX_NAME = "index.sqlite3"
+SEGMENT_PREFIX = "pages-"
+SEGMENT_MAX_BYTES = 512 * 1024 * 1024  # Appends go to a new segment once the current one is past this
+# "zstd" or "gzip"; None uses zstd when the zstandard package is installed
+COMPRESSION = None
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 10
+# Headers describing the transfer rather than the stored body, which is already decoded and may be truncated
+TRANSFER_HEADERS = {"content-encoding", "transfer-encoding", "content-length"}
+
+EXTENSIONS = {"gzip": ".warc.gz", "zstd": ".warc.zst"}
+
+
+def _compressor(codec):
+    if codec == "zstd":
+        import zstandard
+
+        # ZstdCompressor objects aren't thread-safe, and creating one is cheap next to compressing a page
+        return lambda data: zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return lambda data: gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+
+def _decompressor(codec):
+    if codec == "zstd":
+        import zstandard
+
+        return lambda data: zstandard.ZstdDecompressor().decompress(data)
+    return gzip.decompress
+
+
+def default_codec():
+    try:
+        import zstandard  # noqa: F401
+    except ImportError:
+        return "gzip"
+    return "zstd"
+
+
+def make_record(url, status, headers, body, date=None):
+    """
+    One WARC/1.0 response record: WARC headers, then the HTTP status line,
+    headers and body as the payload.
+    """
+    try:
+        reason = http.HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{name}: {value}" for name, value in headers.items() if name.lower() not in TRANSFER_HEADERS]
+    payload = ("\r\n".join(lines) + "\r\n\r\n").encode("iso-8859-1", errors="replace") + body
+    date = datetime.fromtimestamp(date or time.time(), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    warc_headers = (
+        "WARC/1.0\r\n"
+        "WARC-Type: response\r\n"
+        f"WARC-Record-ID: <urn:uuid:{uuid.uuid4()}>\r\n"
+        f"WARC-Date: {date}\r\n"
+        f"WARC-Target-URI: {url}\r\n"
+        "Content-Type: application/http; msgtype=response\r\n"
+        f"Content-Length: {len(payload)}\r\n"
+        "\r\n"
+    )
+    return warc_headers.encode("utf-8") + payload + b"\r\n\r\n"
+
+
+def parse_record(data):
+    """Returns {"url", "date", "status", "headers", "body"} for a make_record() record."""
+    head, _, rest = data.partition(b"\r\n\r\n")
+    warc = dict(line.split(": ", 1) for line in head.decode("utf-8").split("\r\n")[1:])
+    payload = rest[:int(warc["Content-Length"])]
+    http_head, _, body = payload.partition(b"\r\n\r\n")
+    lines = http_head.decode("iso-8859-1").split("\r\n")
+    return {
+        "url": warc["WARC-Target-URI"],
+        "date": warc["WARC-Date"],
+        "status": int(lines[0].split()[1]),
+        "headers": dict(line.split(": ", 1) for line in lines[1:] if line),
+        "body": body,
+    }
+
+
+class PageArchive:
+    """
+    Append-only archive of fetched pages in one directory. Every response is
+    a WARC record compressed on its own (a gzip member, or a zstd frame)
+    and appended to the current numbered segment, and an SQLite index maps
+    each URL to the segment, offset and length of its records, so a page is
+    read back with one seek and one decompression. gzip segments are
+    ordinary .warc.gz files that standard WARC tools can read.
+
+    A record only enters the index after it has been written to its
+    segment, so a crash leaves at most an unindexed tail that is never read.
+    """
+
+    def __init__(self, path, compression=COMPRESSION, segment_max_bytes=SEGMENT_MAX_BYTES):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.codec = compression or default_codec()
+        self.segment_max_bytes = segment_max_bytes
+        self._compress = _compressor(self.codec)
+        self._decompressors = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(path, INDEX_NAME), check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " url TEXT NOT NULL,"
+            " segment TEXT NOT NULL,"
+            " offset INTEGER NOT NULL,"
+            " length INTEGER NOT NULL,"
+            " status INTEGER NOT NULL,"
+            " fetched_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS records_url ON records (url, id)")
+        self._db.commit()
+        self._segment = None
+        self._file = None
+
+    def _segments(self):
+        return sorted(glob.glob(os.path.join(self.path, SEGMENT_PREFIX + "*" + EXTENSIONS[self.codec])))
+
+    def _open_segment(self, size):
+        """Returns the segment file to append `size` more bytes to, starting a new one when full."""
+        if self._file is None:
+            segments = self._segments()
+            if segments and os.path.getsize(segments[-1]) < self.segment_max_bytes:
+                self._segment = os.path.basename(segments[-1])
+            else:
+                self._segment = f"{SEGMENT_PREFIX}{len(segments):05d}{EXTENSIONS[self.codec]}"
+            self._file = open(os.path.join(self.path, self._segment), "ab")
+        elif self._file.tell() and self._file.tell() + size > self.segment_max_bytes:
+            self._file.close()
+            number = int(self._segment[len(SEGMENT_PREFIX):].split(".", 1)[0]) + 1
+            self._segment = f"{SEGMENT_PREFIX}{number:05d}{EXTENSIONS[self.codec]}"
+            self._file = open(os.path.join(self.path, self._segment), "ab")
+        return self._file
+
+    def write(self, url, status, headers, body, final_url=None):
+        """
+        Appends one fetched response under the requested `url`; the record's
+        WARC-Target-URI is `final_url`, where redirects ended up.
+        """
+        now = time.time()
+        data = self._compress(make_record(final_url or url, status, headers, body, now))
+        with self._lock:
+            f = self._open_segment(len(data))
+            f.seek(0, os.SEEK_END)
+            offset = f.tell()
+            f.write(data)
+            f.flush()
+            self._db.execute(
+                "INSERT INTO records (url, segment, offset, length, status, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (url, self._segment, offset, len(data), status, now),
+            )
+            self._db.commit()
+        metrics.inc("archive_records_total")
+        metrics.inc("archive_bytes_total", len(data))
+
+    def _decompress(self, segment, data):
+        codec = next(name for name, extension in EXTENSIONS.items() if segment.endswith(extension))
+        if codec not in self._decompressors:
+            self._decompressors[codec] = _decompressor(codec)
+        return self._decompressors[codec](data)
+
+    def get(self, url):
+        """The latest record archived for `url` (see parse_record), or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT segment, offset, length FROM records WHERE url = ? ORDER BY id DESC LIMIT 1", (url,)
+            ).fetchone()
+        if row is None:
+            metrics.inc("archive_reads_total", result="miss")
+            return None
+        segment, offset, length = row
+        started = time.perf_counter()
+        with open(os.path.join(self.path, segment), "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        record = parse_record(self._decompress(segment, data))
+        metrics.observe("archive_read_seconds", time.perf_counter() - started)
+        metrics.inc("archive_reads_total", result="hit")
+        return record
+
+    def urls(self):
+        with self._lock:
+            return [url for url, in self._db.execute("SELECT DISTINCT url FROM records ORDER BY url")]
+
+    def fetch_page(self, url, throttle=None, state=None):
+        """
+        Drop-in for fetcher.fetch_page that reads the latest archived
+        response instead of the network. Returns None for URLs not in the
+        archive. `throttle` is ignored.
+        """
+        from requests.utils import get_encoding_from_headers
+
+        record = self.get(url)
+        if record is None:
+            log.warning("Page not in the archive", extra={"url": url})
+            return None
+        headers = {name.lower(): value for name, value in record["headers"].items()}
+        previous = state.get(url) if state is not None else None
+        return {
+            "url": url,
+            "body": record["body"],
+            "encoding": get_encoding_from_headers(headers),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "final_url": record["url"],
+            "previous_fingerprint": previous["fingerprint"] if previous else None
+        }
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._db.close()
+
+
+if __name__ == "__main__":
+    # python page_archive.py ARCHIVE_DIR [URL]: lists the archived URLs, or prints one page's headers and body
+    import sys
+
+    archive = PageArchive(sys.argv[1])
+    if len(sys.argv) > 2:
+        record = archive.get(sys.argv[2])
+        if record is None:
+            sys.exit(f"{sys.argv[2]} is not in the archive")
+        print(f"{record['status']} {record['url']} ({record['date']})")
+        for name, value in record["headers"].items():
+            print(f"{name}: {value}")
+        print()
+        sys.stdout.buffer.write(record["body"])
+    else:
+        for url in archive.urls():
+            print(url)
+    archive.close()
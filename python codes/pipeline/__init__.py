@@ -0,0 +1,22 @@
+"""
+Scraping pipeline shared by the startup and grant scrapers: a Profile
+describes one kind of record (tables, prompts, schema, dedup key) and a
+Pipeline runs the crawl, extraction and upsert for it.
+
+    python -m pipeline crawl startup [--resume] [--all]
+    python -m pipeline crawl grant --since 2025-01-01T00:00:00Z [--filter url=like.*.my*]
+    python -m pipeline reparse grant
+    python -m pipeline crawl grant --archive; python -m pipeline replay grant
+    python -m pipeline flush startup
+    python -m pipeline benchmark [--pages 200]
+
+Run these from the "python codes" directory, or put it on PYTHONPATH: the
+package imports the scraper modules next to it (fetcher, dedup,
+supabase_client, ...) as top-level modules, and the journals, crawl state
+and caches are created in the working directory.
+
+Importing the package is cheap: requests, openai and the HTML parsers are
+only imported by the modes that use them.
+"""
+from pipeline.profiles import PROFILES, GrantProfile, Profile, StartupProfile
+from pipeline.runner import Pipeline
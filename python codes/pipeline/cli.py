@@ -0,0 +1,59 @@
+import argparse
+
+from pipeline.profiles import PROFILES
+
+MODES = ("crawl", "reparse", "replay", "flush", "benchmark")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m pipeline",
+                                     description="Scrape URL tables into the startup and grant_programs tables.")
+    parser.add_argument("mode", choices=MODES,
+                        help="crawl: due URLs; reparse: every URL, re-extracted even if unchanged; "
+                             "replay: reparse from the page archive, without the network; "
+                             "flush: write rows left by an interrupted run; benchmark: run benchmark.py")
+    parser.add_argument("profile", nargs="?", choices=sorted(PROFILES), help="required except for benchmark")
+    parser.add_argument("--resume", action="store_true", help="continue the last unfinished run instead of starting over")
+    parser.add_argument("--all", action="store_true", help="crawl every URL, not only those due for a recrawl")
+    parser.add_argument("--archive", action="store_true", help="also write fetched pages to the profile's page archive")
+    parser.add_argument("--since", metavar="TIMESTAMP",
+                        help="only URLs added after this, e.g. 2025-01-01T00:00:00Z")
+    parser.add_argument("--filter", action="append", default=[], metavar="COLUMN=FILTER",
+                        help="PostgREST filter on the URL table, e.g. url=like.*.my*; repeatable")
+    parser.add_argument("--log-level", default="INFO", help="DEBUG also logs raw GPT responses")
+    parser.add_argument("--log-json", action="store_true", help="log one JSON object per line")
+    parser.add_argument("--metrics", help="write run metrics here at the end (.prom for Prometheus text, else JSON)")
+    args, extra = parser.parse_known_args(argv)
+
+    if args.mode == "benchmark":
+        import benchmark
+
+        # Remaining options go to the benchmark; a profile limits it to that scraper
+        benchmark.main(extra + (["--only", args.profile] if args.profile else []))
+        return
+    if extra:
+        parser.error("unrecognized arguments: " + " ".join(extra))
+    if args.profile is None:
+        parser.error(f"{args.mode} needs a profile: " + ", ".join(sorted(PROFILES)))
+    url_filters = {}
+    for url_filter in args.filter:
+        column, sep, value = url_filter.partition("=")
+        if not (column and sep and value):
+            parser.error(f"--filter needs COLUMN=FILTER, got {url_filter!r}")
+        url_filters[column] = value
+    if args.since:
+        url_filters["created_at"] = f"gt.{args.since}"
+
+    from pipeline.runner import Pipeline
+    from telemetry import configure_logging
+
+    configure_logging(args.log_level, args.log_json)
+    pipeline = Pipeline(PROFILES[args.profile])
+    try:
+        if args.mode == "flush":
+            pipeline.flush()
+        else:
+            pipeline.crawl(resume=args.resume, full_crawl=args.all, refetch=args.mode == "reparse",
+                           archive=args.archive, replay=args.mode == "replay", url_filters=url_filters)
+    finally:
+        pipeline.close(args.metrics)
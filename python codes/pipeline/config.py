@@ -0,0 +1,15 @@
+import os
+
+# Settings shared by every profile. Keys fall back to the environment, so deployments don't have to edit code
+OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
+GPT_MODEL = "gpt-3.5-turbo"
+GPT_PARAMS = {"max_tokens": 1500, "temperature": 0.3}
+# "json" extracts through function calling against the profile's schema, "text" uses its free-text prompt
+EXTRACTION_MODE = "json"
+# Pages extracted at once; llm_client.ChatClient still caps the requests in flight and tokens per minute
+EXTRACT_WORKERS = 16
+
+# Supabase Config
+SUPABASE_URL = "https://kbyqlgmkowekcobzakpx.supabase.co/"
+SUPABASE_API_KEY = os.environ.get("SUPABASE_API_KEY", "")
+INSERT_BATCH_SIZE = 100
@@ -0,0 +1,245 @@
+from extraction_schema import GRANT_FUNCTION, STARTUP_FUNCTION, parse_arguments
+from response_parser import GRANT_FIELDS, STARTUP_FIELDS, parse_grants, parse_startups
+from retrieval_index import GRANT_INDEX_FIELDS, STARTUP_INDEX_FIELDS
+
+GRANT_DEFAULTS = {field: "Not specified" for field in GRANT_FIELDS}
+
+
+class Profile:
+    """
+    Everything that differs between the scrapers: source and target tables,
+    prompts and schema, how parsed entries become rows, the dedup key and
+    the near-duplicate merge. The Pipeline drives the crawl itself;
+    subclasses fill in the attributes and override the hooks.
+    """
+
+    name = None
+    url_table = None
+    table = None
+    id_column = None
+    # PostgREST filters for the URL table, e.g. {"created_at": "gt.2025-01-01T00:00:00Z"}; crawl --since and
+    # --filter add to them
+    url_filters = None
+    function = None
+    system_prompt = None
+    instructions = None
+    merge_fields = ()
+    name_fields = ()
+    website_fields = ()
+    description_fields = ()
+    index_fields = ()
+    index_filters = None
+
+    @property
+    def journal_path(self):
+        return f"run_journal_{self.name}.sqlite3"
+
+    @property
+    def state_path(self):
+        return f"crawl_state_{self.name}.sqlite3"
+
+    @property
+    def archive_path(self):
+        """Directory of the raw-page archive written by `crawl --archive` and read by `replay`."""
+        return f"page_archive_{self.name}"
+
+    @property
+    def index_path(self):
+        """Local copy of the index published for the ai-matchmaker function."""
+        return f"{self.table}.idx"
+
+    def json_messages(self, text):
+        return [
+            {"role": "system", "content": self.system_prompt},
+            {"role": "user", "content": self.instructions + "\n---\n" + text},
+        ]
+
+    def text_prompt(self, text):
+        raise NotImplementedError
+
+    def parse_json(self, gpt_text, url):
+        return parse_arguments(gpt_text, self.function)
+
+    def parse_text(self, gpt_text, url):
+        raise NotImplementedError
+
+    def key(self, row):
+        raise NotImplementedError
+
+    def rows(self, url, result, responded, entries):
+        """Rows to store for a page: `result` is the scrape result or None, `entries` the merged extraction."""
+        return entries
+
+    def exclude(self, row):
+        """Rows the near-duplicate merge leaves alone."""
+        return False
+
+    def resolver(self):
+        from entity_resolution import EntityResolver
+
+        return EntityResolver(
+            name_fields=self.name_fields,
+            website_fields=self.website_fields,
+            description_fields=self.description_fields,
+            key_fn=self.key,
+            exclude=self.exclude,
+        )
+
+    def writer(self, client, batch_size, on_flush):
+        from dedup import UpsertWriter
+
+        return UpsertWriter(client, self.table, self.key, batch_size, on_flush, resolver=self.resolver())
+
+
+class StartupProfile(Profile):
+    name = "startup"
+    url_table = "startup_urls"
+    table = "startup"
+    id_column = "No"
+    function = STARTUP_FUNCTION
+    system_prompt = "You extract structured startup data from web pages."
+    instructions = (
+        "Extract every startup, company, entrepreneurial venture or business profile in the page text below. "
+        "Use one item per company even if several are on the same website, and leave out fields the text "
+        "doesn't mention."
+    )
+    merge_fields = ("CompanyName",)
+    name_fields = ("CompanyName",)
+    website_fields = ("WebsiteSocialMedia",)
+    description_fields = ("WhatTheyDo", "ProblemTheySolve", "Sector")
+    index_fields = STARTUP_INDEX_FIELDS
+    index_filters = {"CompanyName": "neq.No data"}
+
+    def text_prompt(self, text):
+        return (
+            "You are a helpful assistant. Extract any information related to startups, companies, "
+            "entrepreneurial ventures, or business profiles. Return only the relevant parts sorted by this format:\n"
+            "Target data types: " + ", ".join(STARTUP_FIELDS) + "\n"
+            "Separate each startup clearly even if they're on the same website.\n"
+            "Format example:\n"
+            "**CompanyName:** XYZ Tech\n"
+            "**WhatTheyDo:** Creates AI-powered tools for education\n"
+            "**Location:** Singapore\n"
+            "**Impact:** Improved learning outcomes for 100,000 students\n"
+            "**ProblemTheySolve:** Lack of personalized learning\n"
+            "**Grants:** Yes, $500,000 from ABC Foundation\n"
+            "**InstitutionalSupport:** Supported by NUS Enterprise\n"
+            "**MaGICAccredited:** Yes\n"
+            "**Sector:** Education Technology\n"
+            "**WebsiteSocialMedia:** https://xyztech.com\n"
+            "**TargetBeneficiaries:** Students and teachers\n"
+            "**RevenueModel:** Subscription-based SaaS\n"
+            "**YearFounded:** 2020\n"
+            "**Awards:** Winner of Startup Asia 2022\n"
+            "---\n"
+            f"{text}"
+        )
+
+    def parse_text(self, gpt_text, url):
+        return parse_startups(gpt_text)
+
+    def key(self, row):
+        from dedup import dedup_key
+
+        # "No data" rows carry the page URL in WebsiteSocialMedia, so there is one placeholder per URL
+        return dedup_key(row.get("WebsiteSocialMedia"), row.get("CompanyName"))
+
+    def rows(self, url, result, responded, entries):
+        # Every URL gets a row, so pages that yield nothing show up in the table as "No data"
+        if not result:
+            return [make_no_data_entry(url, "Website could not be scraped or returned no content.")]
+        if not (result.get("content") or "").strip():
+            return [make_no_data_entry(url, "Page has no text content.")]
+        if not responded and not entries:
+            return [make_no_data_entry(url, "Empty response from GPT model.")]
+        return [map_startup_entry(entry) for entry in entries] or [
+            make_no_data_entry(url, "No startup information extracted by GPT.")
+        ]
+
+    def exclude(self, row):
+        return row.get("CompanyName") == "No data"
+
+    def writer(self, client, batch_size, on_flush):
+        from pipeline.writers import StartupWriter
+
+        return StartupWriter(client, self, batch_size, on_flush)
+
+
+class GrantProfile(Profile):
+    name = "grant"
+    url_table = "grant_urls"
+    table = "grant_programs"
+    id_column = "id"
+    function = GRANT_FUNCTION
+    system_prompt = "You extract structured funding programme data from web pages."
+    instructions = (
+        "Extract every grant programme, funding opportunity, initiative or financial support for businesses "
+        "or technology in the page text below. Use one item per programme even if several are on the same "
+        "website; company_name can be taken from the website link. Leave out fields the text doesn't "
+        "mention."
+    )
+    merge_fields = ("company_name", "fund_name")
+    # Near-duplicates (the same programme listed on several pages) are merged; every name must match
+    name_fields = ("company_name", "fund_name")
+    website_fields = ("website_url",)
+    description_fields = ("description_services", "program_participation")
+    index_fields = GRANT_INDEX_FIELDS
+
+    def text_prompt(self, text):
+        return (
+            "You are a helpful assistant. Extract any information related to grant programmes, "
+            "funding opportunities, initiatives, or financial support for businesses or technology. "
+            "Return only the relevant parts sorted by this format:\n\n"
+            "Target data types: company_name, website_url, industry_sector, description_services, contact_info, social_enterprise_status, related_news_updates, program_participation\n"
+            "Separate each funding program clearly even if they're on the same website.Company_name can be taken from the website link and then you compare\n\n"
+            f"{text}"
+        )
+
+    def parse_json(self, gpt_text, url):
+        return [{**GRANT_DEFAULTS, "website_url": url, **entry} for entry in parse_arguments(gpt_text, self.function)]
+
+    def parse_text(self, gpt_text, url):
+        return parse_grants(gpt_text, url)
+
+    def key(self, row):
+        from dedup import dedup_key
+
+        return dedup_key(row.get("website_url"), row.get("company_name"), row.get("fund_name"))
+
+
+def make_no_data_entry(url, reason):
+    return {
+        "CompanyName": "No data",
+        "WhatTheyDo": reason,
+        "Location": "",
+        "Impact": "",
+        "ProblemTheySolve": "",
+        "Grants": "",
+        "InstitutionalSupport": "",
+        "MaGICAccredited": "",
+        "Sector": "",
+        "WebsiteSocialMedia": url,
+        "TargetBeneficiaries": "",
+        "RevenueModel": "",
+        "YearFounded": "2025",
+        "Awards": ""
+    }
+
+
+def map_startup_entry(entry):
+    mapped_entry = {}
+    for field in STARTUP_FIELDS:
+        value = entry.get(field, "Not defined")
+        if field == "YearFounded":
+            if isinstance(value, int):
+                mapped_entry[field] = value
+            elif value.isdigit():
+                mapped_entry[field] = int(value)
+            else:
+                mapped_entry[field] = None
+        else:
+            mapped_entry[field] = value
+    return mapped_entry
+
+
+PROFILES = {profile.name: profile for profile in (StartupProfile(), GrantProfile())}
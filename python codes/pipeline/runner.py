@@ -0,0 +1,340 @@
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import chain
+
+from chunking import chunk_text, map_chunks, merge_entries
+from crawl_state import CHANGED, FAILED, UNCHANGED, CrawlStateStore, validators
+from gpt_cache import CompletionCache, make_key
+from pipeline import config
+from run_journal import EXTRACTED, FETCHED, PERSISTED, RunJournal
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+
+class Pipeline:
+    """
+    Crawl -> extract -> upsert for one Profile. The Supabase client, chat
+    client, completion cache, crawl state and page archive are created on
+    first use (or passed in, e.g. by the benchmark), so modes that don't
+    need the network or the model never import requests or openai.
+    """
+
+    def __init__(self, profile, supabase=None, chat_client=None, gpt_cache=None, crawl_state=None,
+                 archive=None, extraction_mode=config.EXTRACTION_MODE):
+        self.profile = profile
+        self.extraction_mode = extraction_mode
+        self._supabase = supabase
+        self._chat_client = chat_client
+        self._gpt_cache = gpt_cache
+        self._crawl_state = crawl_state
+        self._archive = archive
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase_client import SupabaseClient
+
+            self._supabase = SupabaseClient(config.SUPABASE_URL, config.SUPABASE_API_KEY)
+        return self._supabase
+
+    @property
+    def chat_client(self):
+        if self._chat_client is None:
+            import openai
+            from llm_client import ChatClient
+
+            if config.OPENAI_API_KEY:
+                openai.api_key = config.OPENAI_API_KEY
+            self._chat_client = ChatClient(config.GPT_MODEL)
+        return self._chat_client
+
+    @property
+    def gpt_cache(self):
+        if self._gpt_cache is None:
+            self._gpt_cache = CompletionCache()
+        return self._gpt_cache
+
+    @property
+    def crawl_state(self):
+        if self._crawl_state is None:
+            self._crawl_state = CrawlStateStore(self.profile.state_path)
+        return self._crawl_state
+
+    @property
+    def archive(self):
+        if self._archive is None:
+            from page_archive import PageArchive
+
+            self._archive = PageArchive(self.profile.archive_path)
+        return self._archive
+
+    def urls(self, filters=None):
+        """
+        Streams URLs from the profile's URL table page by page, so scraping
+        starts on the first page while later pages are still loading.
+        `filters` are PostgREST filters applied server side.
+        """
+        from supabase_client import SupabaseError, iter_urls
+
+        count = 0
+        try:
+            for url in iter_urls(self.supabase, self.profile.url_table, filters=filters):
+                count += 1
+                yield url
+        except SupabaseError as e:
+            log.error("Failed to fetch URLs from Supabase", extra={"status": e.status_code, "error": e.text})
+        except Exception as e:
+            log.error("Error fetching URLs from Supabase", extra={"error": str(e)})
+        log.info("Retrieved URLs from Supabase", extra={"table": self.profile.url_table, "urls": count})
+
+    def call_gpt(self, messages, functions=None):
+        """
+        The model's answer, from the completion cache when possible. Raises
+        when the call still fails after ChatClient's retries, so the page is
+        left for --resume instead of being stored as an empty response.
+        """
+        params = dict(config.GPT_PARAMS)
+        if functions:
+            params["functions"] = functions
+        cache_key = make_key(config.GPT_MODEL, messages, **params)
+        cached = self.gpt_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        try:
+            content = self.chat_client.complete_sync(messages, **params)
+            self.gpt_cache.set(cache_key, content)
+            return content
+        except Exception as e:
+            log.error("OpenAI API error", extra={"error": str(e)})
+            raise
+
+    def extract(self, text):
+        if self.extraction_mode == "json":
+            return self.call_gpt(self.profile.json_messages(text), functions=[self.profile.function])
+        return self.call_gpt([
+            {"role": "system", "content": "You are a helpful assistant."},
+            {"role": "user", "content": self.profile.text_prompt(text)}
+        ])
+
+    def parse_response(self, gpt_text, url):
+        log.debug("Raw GPT response", extra={"url": url, "response": gpt_text})
+        started = time.perf_counter()
+        if self.extraction_mode == "json":
+            entries = self.profile.parse_json(gpt_text, url)
+        else:
+            entries = self.profile.parse_text(gpt_text, url)
+        metrics.observe("response_parse_seconds", time.perf_counter() - started)
+        metrics.inc("entries_parsed_total", len(entries))
+        log.info("Parsed entries", extra={"profile": self.profile.name, "url": url, "entries": len(entries)})
+        return entries
+
+    def extract_page(self, result):
+        """
+        Sends every chunk of the page text to GPT concurrently and returns
+        (whether every chunk got an answer, entries merged on the profile's
+        merge fields). A page with only some chunks answered doesn't count as
+        extracted, so its validators aren't recorded and the next run
+        extracts it again. A page without text never reaches the model.
+        """
+        chunks = chunk_text((result.get("content") or "").strip())
+        if not chunks:
+            return False, []
+        responses = map_chunks(self.extract, chunks)
+        entries = []
+        for gpt_text in responses:
+            if gpt_text:
+                entries.extend(self.parse_response(gpt_text, result["url"]))
+        return all(responses), merge_entries(entries, self.profile.merge_fields)
+
+    def persist_page(self, writer, journal, url, rows, state=None, visit=None):
+        """
+        Checkpoints a page's rows in the journal, then queues them for
+        insertion. `state` (validators) and `visit` (a recrawl outcome) are
+        recorded once the rows are written.
+        """
+        journal.mark(url, EXTRACTED, {"rows": rows, "state": state, "visit": visit})
+        for row in rows:
+            writer.add(dict(row))
+        writer.page_done((url, state, visit))
+
+    def store_page(self, writer, journal, url, result, responded=False, entries=(), record_state=True,
+                   record_visit=True):
+        """
+        Turns a page's extraction (none for a failed fetch) into the
+        profile's rows and persists them. Once its rows are written, a
+        fetched page is rescheduled as CHANGED with `record_visit`, and its
+        validators are saved to the crawl state with `record_state`.
+        """
+        rows = self.profile.rows(url, result, responded, list(entries))
+        # A page the model answered for is done even with nothing to store, so it isn't re-extracted next run
+        if rows or responded:
+            state = validators(result) if responded and record_state else None
+            visit = CHANGED if result and record_visit else None
+            self.persist_page(writer, journal, url, rows, state, visit)
+
+    def process_pages(self, writer, journal, pages, record_state=True, record_visit=True):
+        """
+        Extract stage: runs extract_page on a pool for up to
+        config.EXTRACT_WORKERS pages at once and persists each page from
+        this thread as soon as its extraction finishes. `pages` yields
+        (url, scrape result or None) and is consumed lazily, so when every
+        worker is busy no further pages are pulled and fetching upstream
+        waits. Model calls across pages then run up to ChatClient's
+        concurrency and token budget instead of one page at a time.
+        `record_state` and `record_visit` are passed on to store_page.
+        """
+        extracting = {}
+
+        def store(done):
+            for future in done:
+                url, result = extracting.pop(future)
+                try:
+                    responded, entries = future.result()
+                except Exception as e:
+                    # Left at FETCHED in the journal, so --resume retries it
+                    log.error("Error extracting page", extra={"url": url, "error": str(e)})
+                    metrics.inc("extract_failures_total")
+                    continue
+                self.store_page(writer, journal, url, result, responded, entries, record_state, record_visit)
+
+        with ThreadPoolExecutor(max_workers=config.EXTRACT_WORKERS) as pool:
+            for url, result in pages:
+                if not result:
+                    self.store_page(writer, journal, url, result)
+                    continue
+                log.info("Filtering content using OpenAI", extra={"url": url})
+                extracting[pool.submit(self.extract_page, result)] = (url, result)
+                full = len(extracting) >= config.EXTRACT_WORKERS
+                store(wait(extracting, timeout=None if full else 0, return_when=FIRST_COMPLETED)[0])
+            while extracting:
+                store(wait(extracting, return_when=FIRST_COMPLETED)[0])
+
+    def _writer(self, journal):
+        # Pages only count as persisted (and crawled) once their rows are in the DB
+        def on_flush(pages):
+            for url, state, visit in pages:
+                journal.mark(url, PERSISTED)
+                if state is not None:
+                    self.crawl_state.record(state)
+                if visit is not None:
+                    self.crawl_state.record_visit(url, visit)
+
+        return self.profile.writer(self.supabase, config.INSERT_BATCH_SIZE, on_flush)
+
+    def crawl(self, resume=False, full_crawl=False, refetch=False, archive=False, replay=False, url_filters=None):
+        """
+        Scrapes the profile's URLs and upserts what the model extracts.
+        Only URLs due for a recrawl are visited unless `full_crawl`; with
+        `refetch` every page is fetched without conditional GETs and
+        re-extracted even if its text is unchanged, e.g. after a prompt or
+        parser change; identical model calls still come from the completion
+        cache, so a parser change costs no model calls. Such visits don't
+        count towards the recrawl schedule. With `resume` an
+        interrupted run is continued first. `url_filters` are PostgREST
+        filters on the URL table, on top of the profile's.
+
+        With `archive` every fetched page is also written to the profile's
+        page archive. `replay` is `refetch` from that archive instead of the
+        network: URLs that were never archived are skipped, and neither the
+        recrawl schedule nor the stored validators change since no site was
+        visited.
+        """
+        from fetcher import scrape_many
+
+        journal = RunJournal(self.profile.journal_path, resume=resume)
+        urls = self.urls({**(self.profile.url_filters or {}), **(url_filters or {})})
+        first_url = next(urls, None)
+        if first_url is None:
+            log.warning("No URLs found in Supabase, exiting")
+            return
+
+        with self._writer(journal) as writer:
+            # Work left over from an interrupted run: rows not yet written, pages not yet extracted
+            for url, payload in journal.pending(EXTRACTED):
+                self.persist_page(writer, journal, url, payload["rows"], payload["state"], payload.get("visit"))
+            self.process_pages(writer, journal, journal.pending(FETCHED))
+
+            refetch = refetch or replay
+            urls = chain([first_url], urls)
+            if not (full_crawl or refetch):
+                # Only pages whose recrawl is due; each visit's outcome reschedules the page
+                urls = self.crawl_state.due(urls)
+            new_urls = (url for url in urls if journal.stage(url) is None)
+            state = None if refetch else self.crawl_state
+            pages = scrape_many(new_urls, state=state, archive=self.archive if archive or replay else None,
+                                replay=replay)
+
+            def fetched():
+                for url, result in pages:
+                    if replay and not result:
+                        continue
+                    # A forced refetch says nothing about whether the page changed since the last visit.
+                    # Changed pages are only rescheduled once their rows are written (see store_page), so
+                    # a crash or failed batch leaves them due for the next run
+                    if not refetch and (not result or result.get("unchanged")):
+                        self.crawl_state.record_visit(url, UNCHANGED if result else FAILED)
+                    if result and result.get("unchanged"):
+                        if result.get("fingerprint"):
+                            # Same text under a new ETag: without this the stale one never gets a 304
+                            self.crawl_state.record(validators(result))
+                        journal.mark(url, PERSISTED)
+                        continue
+                    if result:
+                        journal.mark(url, FETCHED, result)
+                    yield url, result
+
+            # Archived ETags and fingerprints are older than what the crawl state already holds
+            self.process_pages(writer, journal, fetched(), record_state=not replay, record_visit=not refetch)
+
+        self._finish(journal, writer)
+
+    def flush(self):
+        """
+        Writes the rows an interrupted run had already extracted, without
+        fetching pages or calling the model. Pages still waiting for
+        extraction stay in the journal for the next --resume.
+        """
+        journal = RunJournal(self.profile.journal_path, resume=True)
+        with self._writer(journal) as writer:
+            for url, payload in journal.pending(EXTRACTED):
+                self.persist_page(writer, journal, url, payload["rows"], payload["state"], payload.get("visit"))
+        if any(True for _ in journal.pending(FETCHED)):
+            log.info("Fetched pages are still waiting for extraction; run crawl --resume to finish them")
+            return
+        self._finish(journal, writer)
+
+    def _finish(self, journal, writer):
+        from retrieval_index import publish_index
+
+        if not writer.written and not writer.failed and not writer.skipped:
+            log.info("No records extracted to save", extra={"table": self.profile.table})
+        if writer.written:
+            publish_index(self.supabase, self.profile.table, self.profile.id_column, self.profile.index_fields,
+                          self.profile.index_path, filters=self.profile.index_filters)
+        if writer.skipped:
+            log.info("Skipped unchanged records", extra={"rows": writer.skipped})
+        if writer.resolver.merged:
+            log.info("Merged near-duplicate entries", extra={"entries": writer.resolver.merged})
+        unextracted = sum(1 for _ in journal.pending(FETCHED))
+        if unextracted:
+            log.warning("Pages failed extraction; run with --resume to retry them", extra={"pages": unextracted})
+        if writer.failed:
+            log.warning("Rows failed to insert; run with --resume to retry them", extra={"rows": writer.failed})
+        if not writer.failed and not unextracted:
+            journal.finish()
+
+    def close(self, metrics_path=None):
+        if self._crawl_state is not None:
+            self._crawl_state.close()
+        if self._archive is not None:
+            self._archive.close()
+        if self._gpt_cache is not None:
+            self._gpt_cache.close()
+            log.info("GPT cache stats", extra=self._gpt_cache.stats())
+        if self._chat_client is not None:
+            log.info("OpenAI stats", extra=self._chat_client.stats())
+        if metrics_path:
+            metrics.export(metrics_path)
+            log.info("Wrote metrics", extra={"path": metrics_path})
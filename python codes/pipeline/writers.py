@@ -0,0 +1,46 @@
+import logging
+
+from dedup import UpsertWriter
+from supabase_client import SupabaseError
+
+log = logging.getLogger(__name__)
+
+RESERVE_FUNCTION = "reserve_startup_numbers"
+
+
+class StartupWriter(UpsertWriter):
+    """
+    Upserts into the startup table on the website/company key, after merging
+    near-duplicate listings of the same company seen during the run.
+    Companies already in the table keep their `No`; new ones get `No` values
+    from blocks of `batch_size` numbers reserved atomically in the database
+    (see reserve_startup_numbers), so concurrent runs never share a `No`.
+    A failed reservation raises instead of guessing a number.
+    """
+
+    def __init__(self, client, profile, batch_size, on_flush=None):
+        super().__init__(client, profile.table, profile.key, batch_size, on_flush,
+                         extra_columns=("No",), resolver=profile.resolver())
+        self.next_No = None
+        self.reserved_until = None  # Last No of the current block
+
+    def reserve(self):
+        try:
+            first = self.client.rpc(RESERVE_FUNCTION, {"block_size": self.batch_size})
+        except SupabaseError as e:
+            log.error("Failed to reserve startup numbers, aborting the run",
+                      extra={"status": e.status_code, "error": e.text})
+            raise
+        self.next_No = first
+        self.reserved_until = first + self.batch_size - 1
+        log.info("Reserved startup numbers", extra={"first": first, "last": self.reserved_until})
+
+    def prepare(self, row, existing):
+        if existing is not None:
+            row["No"] = existing["No"]
+            return row
+        if self.next_No is None or self.next_No > self.reserved_until:
+            self.reserve()
+        row["No"] = self.next_No  # Add the generated No to the entry
+        self.next_No += 1
+        return row
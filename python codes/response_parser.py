@@ -0,0 +1,215 @@
+import json
+import re
+import sys
+
+# Exact startup table headers — DO NOT CHANGE
+STARTUP_FIELDS = [
+    "No",
+    "CompanyName",
+    "WhatTheyDo",
+    "Location",
+    "Impact",
+    "ProblemTheySolve",
+    "Grants",
+    "InstitutionalSupport",
+    "MaGICAccredited",
+    "Sector",
+    "WebsiteSocialMedia",
+    "TargetBeneficiaries",
+    "RevenueModel",
+    "YearFounded",
+    "Awards"
+]
+
+GRANT_FIELDS = [
+    "company_name",
+    "website_url",
+    "industry_sector",
+    "description_services",
+    "fund_name",
+    "contact_info",
+    "social_enterprise_status",
+    "related_news_updates",
+    "program_participation"
+]
+
+FIELD = "field"
+SEPARATOR = "separator"
+ITEM = "item"
+TEXT = "text"
+BLANK = "blank"
+
+_separator = re.compile(r"-{3,}|={3,}|\*{3,}")
+_item = re.compile(r"(?:[-*•]|\d+[.)])\s+(.*)")
+_fund_split = re.compile(r"\s*(?::|\s[-–]\s)\s*")
+
+
+def _field_pattern(fields):
+    names = "|".join(sorted((re.escape(f) for f in fields), key=len, reverse=True))
+    # Optional list marker and markdown bold around the name: "- **Field:** value", "Field: value"
+    return re.compile(rf"(?:[-*]\s+)?(?:\*\*)?({names})(?:\*\*)?\s*:\s*(?:\*\*)?\s*(.*)", re.IGNORECASE)
+
+
+class ResponseTokenizer:
+    """
+    Splits a model response into (kind, name, value, indented) records in a
+    single pass over its lines, with one precompiled regex per schema.
+    Field names are matched case-insensitively and returned in canonical form.
+    """
+
+    def __init__(self, fields):
+        self.pattern = _field_pattern(fields)
+        self.canonical = {f.lower(): f for f in fields}
+
+    def tokenize(self, text):
+        for raw_line in text.splitlines():
+            line = raw_line.strip()
+            indented = raw_line[:1].isspace()
+            if not line:
+                yield BLANK, None, "", False
+                continue
+            if _separator.fullmatch(line):
+                yield SEPARATOR, None, "", False
+                continue
+            match = self.pattern.match(line)
+            if match:
+                value = match.group(2).strip()
+                if value.endswith("**"):
+                    value = value[:-2].rstrip()
+                yield FIELD, self.canonical[match.group(1).lower()], value, indented
+                continue
+            match = _item.fullmatch(line)
+            if match:
+                yield ITEM, None, match.group(1).strip(), indented
+                continue
+            yield TEXT, None, line, indented
+
+
+startup_tokenizer = ResponseTokenizer(STARTUP_FIELDS)
+grant_tokenizer = ResponseTokenizer(GRANT_FIELDS)
+
+
+def _append(entry, field, text):
+    entry[field] = f"{entry[field]} {text}".strip() if entry.get(field) else text
+
+
+def parse_startups(gpt_text):
+    """
+    Startup responses: one `**Field:** value` line per field, entries split
+    by `---` or by a new CompanyName. Lines following a field that aren't
+    fields themselves continue its value until a blank line.
+    """
+    entries = []
+    entry = {}
+    current = None
+    for kind, name, value, _ in startup_tokenizer.tokenize(gpt_text):
+        if kind == FIELD:
+            if name == "CompanyName" and "CompanyName" in entry:
+                entries.append(entry)
+                entry = {}
+            entry[name] = value
+            current = name
+        elif kind == SEPARATOR:
+            if "CompanyName" in entry:
+                entries.append(entry)
+            entry = {}
+            current = None
+        elif kind == BLANK:
+            current = None
+        elif current is not None:
+            _append(entry, current, value)
+    if "CompanyName" in entry:
+        entries.append(entry)
+    return entries
+
+
+def _first_line_name(gpt_text):
+    for line in gpt_text.splitlines():
+        line = line.strip().strip("*#").strip()
+        if line:
+            return re.split(r"\s*[:(]", line, maxsplit=1)[0].strip()
+    return ""
+
+
+def parse_grants(gpt_text, source_url):
+    """
+    Grant responses: shared company details plus a `program_participation:`
+    section whose list items (`- Fund: description` or `1. Fund - description`)
+    become one entry each. Indented lines continue the preceding field or item;
+    the program section ends at the first blank line after it has content.
+    """
+    shared = {}
+    funds = []
+    program_lines = []
+    current = None
+    in_program = False
+    for kind, name, value, indented in grant_tokenizer.tokenize(gpt_text):
+        if kind == FIELD and not (in_program and indented):
+            in_program = name == "program_participation"
+            current = name
+            if in_program:
+                if value:
+                    program_lines.append(value)
+            elif name not in shared:
+                shared[name] = value
+            continue
+        if in_program:
+            if kind == BLANK:
+                if funds or program_lines:
+                    in_program = False
+                    current = None
+            elif kind == ITEM:
+                parts = _fund_split.split(value, maxsplit=1)
+                funds.append([parts[0].strip("* "), parts[1].strip() if len(parts) > 1 else ""])
+            elif funds and (indented or kind == TEXT):
+                funds[-1][1] = f"{funds[-1][1]} {value}".strip()
+            else:
+                program_lines.append(value)
+        elif kind == BLANK:
+            current = None
+        elif current is not None and indented and kind != SEPARATOR:
+            _append(shared, current, value)
+
+    website_url = (shared.get("website_url") or "").split()
+    base = {
+        "company_name": shared.get("company_name") or _first_line_name(gpt_text) or "Not specified",
+        "website_url": website_url[0] if website_url else source_url,
+        "industry_sector": shared.get("industry_sector") or "Not specified",
+        "description_services": shared.get("description_services") or "Not specified",
+        "fund_name": shared.get("fund_name") or "Not specified",
+        "contact_info": shared.get("contact_info") or "Not specified",
+        "social_enterprise_status": shared.get("social_enterprise_status") or "Not specified",
+        "related_news_updates": shared.get("related_news_updates") or "Not specified",
+        "program_participation": " ".join(program_lines) or "Not specified"
+    }
+    if not funds:
+        return [base]
+    return [dict(base, fund_name=fund_name or "Not specified", program_participation=description or "Not specified")
+            for fund_name, description in funds]
+
+
+def reparse(lines, schema):
+    """
+    Offline reparse: reads JSON lines of {"url", "response"} and yields
+    {"url", "entries"} using the given schema ("startup" or "grant").
+    """
+    for line in lines:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        if schema == "startup":
+            entries = parse_startups(record["response"])
+        else:
+            entries = parse_grants(record["response"], record.get("url", ""))
+        yield {"url": record.get("url"), "entries": entries}
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in ("startup", "grant"):
+        print("Usage: python response_parser.py startup|grant [FILE ...] < responses.jsonl")
+        sys.exit(2)
+    files = sys.argv[2:]
+    streams = [open(path, encoding="utf-8") for path in files] if files else [sys.stdin]
+    for stream in streams:
+        for parsed in reparse(stream, sys.argv[1]):
+            print(json.dumps(parsed, ensure_ascii=False))
@@ -0,0 +1,231 @@
+import heapq
+import json
+import logging
+import math
+import re
+import struct
+import sys
+import unicodedata
+from array import array
+from collections import Counter
+
+log = logging.getLogger(__name__)
+
+INDEX_BUCKET = "retrieval-index"  # Supabase Storage bucket the ai-matchmaker function reads
+TOP_K = 25
+MAGIC = b"HMRI"
+VERSION = 1
+
+STARTUP_INDEX_FIELDS = ("WhatTheyDo", "Sector", "ProblemTheySolve")
+GRANT_INDEX_FIELDS = ("description_services", "industry_sector", "program_participation", "fund_name")
+
+# Written into every index so the edge function tokenises prompts the same way
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been but by can could defined did do does for from had has
+have how if in into is it its may more most no not of on or other our over per provides so such than that
+the their them then there these they this those through to up us was we were what when where which while
+who will with within would you your specified unknown
+""".split())
+
+_token = re.compile(r"[a-z0-9]+")
+_header = struct.Struct("<4sII")
+
+
+def tokenize(text):
+    """ASCII-folded lowercase words of `text`, without stopwords and single characters."""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode("ascii").lower()
+    return [token for token in _token.findall(text) if len(token) > 1 and token not in STOPWORDS]
+
+
+def _row_tokens(row, fields):
+    for field in fields:
+        yield from tokenize(row.get(field))
+
+
+def _little_endian(values):
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+class RetrievalIndex:
+    """
+    TF-IDF index over a few text columns of a table, stored term-major as
+    flat arrays: for term t, the ids and weights of the rows containing it
+    are doc_ids/weights[term_ptr[t]:term_ptr[t + 1]]. Row vectors are
+    L2-normalised, so a query is a sum over its terms' posting lists and
+    scores are cosine similarities.
+    """
+
+    def __init__(self, table, id_column, fields, ids, terms, idf, term_ptr, doc_ids, weights):
+        self.table = table
+        self.id_column = id_column
+        self.fields = tuple(fields)
+        self.ids = ids
+        self.terms = terms
+        self.idf = idf
+        self.term_ptr = term_ptr
+        self.doc_ids = doc_ids
+        self.weights = weights
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+
+    @classmethod
+    def build(cls, rows, table, id_column, fields):
+        """Builds the index from row dicts holding `id_column` and `fields`."""
+        ids = array("i")
+        counts = []
+        df = Counter()
+        for row in rows:
+            tokens = Counter(_row_tokens(row, fields))
+            if not tokens:
+                continue
+            ids.append(int(row[id_column]))
+            counts.append(tokens)
+            df.update(tokens.keys())
+
+        n = len(ids)
+        terms = sorted(df)
+        term_ids = {term: i for i, term in enumerate(terms)}
+        idf = array("f", (math.log((1 + n) / (1 + df[term])) + 1 for term in terms))
+        postings = [[] for _ in terms]
+        for doc, tokens in enumerate(counts):
+            vector = {term_ids[t]: (1 + math.log(c)) * idf[term_ids[t]] for t, c in tokens.items()}
+            norm = math.sqrt(sum(w * w for w in vector.values()))
+            for term, weight in vector.items():
+                postings[term].append((doc, weight / norm))
+
+        term_ptr = array("I", [0])
+        doc_ids = array("I")
+        weights = array("f")
+        for posting in postings:
+            for doc, weight in posting:
+                doc_ids.append(doc)
+                weights.append(weight)
+            term_ptr.append(len(doc_ids))
+        return cls(table, id_column, fields, ids, terms, idf, term_ptr, doc_ids, weights)
+
+    def query(self, text, k=TOP_K):
+        """Returns up to `k` (row id, score) pairs, best first."""
+        tokens = Counter(t for t in tokenize(text) if t in self.term_ids)
+        if not tokens:
+            return []
+        vector = {self.term_ids[t]: (1 + math.log(c)) * self.idf[self.term_ids[t]] for t, c in tokens.items()}
+        norm = math.sqrt(sum(w * w for w in vector.values()))
+        scores = {}
+        get = scores.get
+        for term, weight in vector.items():
+            weight /= norm
+            start, end = self.term_ptr[term], self.term_ptr[term + 1]
+            for doc, doc_weight in zip(self.doc_ids[start:end], self.weights[start:end]):
+                scores[doc] = get(doc, 0.0) + weight * doc_weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [(self.ids[doc], score) for doc, score in best]
+
+    def to_bytes(self):
+        """
+        Binary layout: magic, version, header length, the JSON header padded
+        to 4 bytes, then the little-endian arrays ids (int32), idf (float32),
+        term_ptr (uint32), doc_ids (uint32) and weights (float32).
+        """
+        header = json.dumps({
+            "table": self.table,
+            "id_column": self.id_column,
+            "fields": list(self.fields),
+            "terms": self.terms,
+            "stopwords": sorted(STOPWORDS),
+            "doc_count": len(self.ids),
+            "nnz": len(self.doc_ids),
+        }).encode("utf-8")
+        header += b" " * (-(len(header) + _header.size) % 4)
+        parts = [_header.pack(MAGIC, VERSION, len(header)), header]
+        parts += [_little_endian(a) for a in (self.ids, self.idf, self.term_ptr, self.doc_ids, self.weights)]
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data):
+        magic, version, header_len = _header.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a retrieval index, or an unsupported version")
+        offset = _header.size
+        header = json.loads(data[offset:offset + header_len])
+        offset += header_len
+        n_terms = len(header["terms"])
+        arrays = []
+        for typecode, length in (("i", header["doc_count"]), ("f", n_terms), ("I", n_terms + 1),
+                                 ("I", header["nnz"]), ("f", header["nnz"])):
+            values = array(typecode)
+            size = values.itemsize * length
+            values.frombytes(data[offset:offset + size])
+            if sys.byteorder == "big":
+                values.byteswap()
+            arrays.append(values)
+            offset += size
+        ids, idf, term_ptr, doc_ids, weights = arrays
+        return cls(header["table"], header["id_column"], header["fields"], ids, header["terms"],
+                   idf, term_ptr, doc_ids, weights)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.from_bytes(f.read())
+
+
+def publish_index(client, table, id_column, fields, path=None, filters=None, bucket=INDEX_BUCKET):
+    """
+    Rebuilds the index from every row of `table` matching the PostgREST
+    `filters`, saves it to `path` (default "<table>.idx") and uploads it to
+    the `bucket` Storage bucket as "<table>.idx". Returns the index, or None
+    if the table couldn't be read.
+    """
+    from supabase_client import SupabaseError
+
+    path = path or f"{table}.idx"
+    columns = ",".join((id_column,) + tuple(fields))
+    try:
+        filters = {**(filters or {}), id_column: "not.is.null"}
+        rows = client.select_pages(table, key=id_column, columns=columns, filters=filters)
+        index = RetrievalIndex.build(rows, table, id_column, fields)
+    except SupabaseError as e:
+        log.error("Failed to read table for the retrieval index",
+                  extra={"table": table, "status": e.status_code, "error": e.text})
+        return None
+    except Exception as e:
+        log.error("Error reading table for the retrieval index", extra={"table": table, "error": str(e)})
+        return None
+    data = index.to_bytes()
+    with open(path, "wb") as f:
+        f.write(data)
+    try:
+        client.upload(bucket, f"{table}.idx", data)
+        log.info("Published retrieval index", extra={"table": table, "rows": len(index.ids), "bytes": len(data)})
+    except SupabaseError as e:
+        log.error("Failed to upload retrieval index", extra={"table": table, "status": e.status_code, "error": e.text})
+    except Exception as e:
+        log.error("Error uploading retrieval index", extra={"table": table, "error": str(e)})
+    return index
+
+
+if __name__ == "__main__":
+    # python retrieval_index.py build startup|grant INDEX < rows.jsonl
+    # python retrieval_index.py query INDEX "prompt" [K]
+    if len(sys.argv) >= 4 and sys.argv[1] == "build" and sys.argv[2] in ("startup", "grant"):
+        if sys.argv[2] == "startup":
+            spec = ("startup", "No", STARTUP_INDEX_FIELDS)
+        else:
+            spec = ("grant_programs", "id", GRANT_INDEX_FIELDS)
+        index = RetrievalIndex.build((json.loads(line) for line in sys.stdin if line.strip()), *spec)
+        index.save(sys.argv[3])
+        print(f"{len(index.ids)} rows, {len(index.terms)} terms, {len(index.doc_ids)} postings")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "query":
+        index = RetrievalIndex.load(sys.argv[2])
+        for row_id, score in index.query(sys.argv[3], int(sys.argv[4]) if len(sys.argv) > 4 else TOP_K):
+            print(f"{row_id}\t{score:.4f}")
+    else:
+        print('Usage: python retrieval_index.py build startup|grant INDEX < rows.jsonl\n'
+              '       python retrieval_index.py query INDEX "prompt" [K]')
+        sys.exit(2)
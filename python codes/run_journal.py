@@ -0,0 +1,89 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+FETCHED = "fetched"
+EXTRACTED = "extracted"
+PERSISTED = "persisted"
+
+
+class RunJournal:
+    """
+    Records how far each URL of a crawl run has progressed (fetched,
+    extracted, persisted) together with the data needed to continue from
+    there: the scrape result after fetching, the parsed rows after
+    extraction. With resume=True the latest unfinished run is continued;
+    otherwise a new run starts and older runs are dropped.
+    """
+
+    def __init__(self, path, resume=False):
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS runs ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " started_at REAL NOT NULL,"
+            " finished_at REAL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS urls ("
+            " run_id INTEGER NOT NULL,"
+            " url TEXT NOT NULL,"
+            " stage TEXT NOT NULL,"
+            " payload TEXT,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (run_id, url))"
+        )
+        row = None
+        if resume:
+            row = self._db.execute(
+                "SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1"
+            ).fetchone()
+        if row:
+            self.run_id = row[0]
+            counts = dict(self._db.execute(
+                "SELECT stage, COUNT(*) FROM urls WHERE run_id = ? GROUP BY stage", (self.run_id,)
+            ).fetchall())
+            log.info("Resuming run", extra={"run_id": self.run_id, "stages": counts})
+        else:
+            if resume:
+                log.info("No unfinished run to resume, starting a new one")
+            self._db.execute("DELETE FROM urls")
+            self._db.execute("DELETE FROM runs")
+            self.run_id = self._db.execute("INSERT INTO runs (started_at) VALUES (?)", (time.time(),)).lastrowid
+        self._db.commit()
+
+    def stage(self, url):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT stage FROM urls WHERE run_id = ? AND url = ?", (self.run_id, url)
+            ).fetchone()
+        return row[0] if row else None
+
+    def mark(self, url, stage, payload=None):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO urls (run_id, url, stage, payload, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (self.run_id, url, stage, json.dumps(payload) if payload is not None else None, time.time()),
+            )
+            self._db.commit()
+
+    def pending(self, stage):
+        """Yields (url, payload) for every URL of this run left at `stage`."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT url, payload FROM urls WHERE run_id = ? AND stage = ?", (self.run_id, stage)
+            ).fetchall()
+        for url, payload in rows:
+            yield url, json.loads(payload) if payload else None
+
+    def finish(self):
+        with self._lock:
+            self._db.execute("UPDATE runs SET finished_at = ? WHERE id = ?", (time.time(), self.run_id))
+            self._db.commit()
+            self._db.close()
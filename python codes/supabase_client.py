@@ -0,0 +1,261 @@
+import logging
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from telemetry import metrics
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 15
+DEFAULT_RETRIES = 5
+DEFAULT_POOL_SIZE = 32
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_PAGE_SIZE = 500
+
+
+class SupabaseError(Exception):
+    """Raised when PostgREST answers with a non-2xx status after retries."""
+
+    def __init__(self, status_code, text):
+        super().__init__(f"Status Code: {status_code}, Error: {text}")
+        self.status_code = status_code
+        self.text = text
+
+
+class SupabaseClient:
+    """
+    Minimal PostgREST client for the Supabase project.
+    Keeps keep-alive connection pools and the auth headers for the lifetime
+    of the process, applies a timeout to every call and retries 429/5xx
+    responses with exponential backoff (honouring Retry-After). Requests that
+    aren't idempotent are only retried when they can't have been applied.
+    """
+
+    def __init__(self, base_url, api_key, timeout=DEFAULT_TIMEOUT,
+                 max_retries=DEFAULT_RETRIES, pool_size=DEFAULT_POOL_SIZE):
+        self.rest_url = base_url.rstrip("/") + "/rest/v1"
+        self.storage_url = base_url.rstrip("/") + "/storage/v1"
+        self.timeout = timeout
+        auth = {
+            "apikey": api_key,
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        }
+        # Reads, upserts and Storage uploads with x-upsert give the same result when repeated, so they
+        # retry on anything transient, including read timeouts and 504s after the request may have run
+        self.session = self._session(auth, pool_size, Retry(
+            total=max_retries,
+            backoff_factor=0.5,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ))
+        # Plain inserts and RPCs would be applied twice by such a retry. They only retry when the
+        # request can't have reached the database: connection errors, 429 and 503
+        self.unsafe_session = self._session(auth, pool_size, Retry(
+            total=max_retries,
+            read=0,
+            other=0,
+            backoff_factor=0.5,
+            status_forcelist=(429, 503),
+            allowed_methods=None,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        ))
+
+    @staticmethod
+    def _session(headers, pool_size, retry):
+        session = requests.Session()
+        session.headers.update(headers)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _request(self, method, table, params=None, json=None, headers=None, idempotent=True):
+        session = self.session if idempotent else self.unsafe_session
+        response = session.request(
+            method,
+            f"{self.rest_url}/{table}",
+            params=params,
+            json=json,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        if response.status_code >= 300:
+            raise SupabaseError(response.status_code, response.text)
+        return response
+
+    def select(self, table, columns="*", filters=None, order=None, limit=None, offset=None):
+        """
+        Returns the rows of `table` as a list of dicts.
+        `filters` is a dict of PostgREST filters, e.g. {"url": "like.http*"}.
+        """
+        params = {"select": columns}
+        if filters:
+            params.update(filters)
+        if order:
+            params["order"] = order
+        if limit is not None:
+            params["limit"] = limit
+        if offset is not None:
+            params["offset"] = offset
+        return self._request("GET", table, params=params).json()
+
+    def select_pages(self, table, key, columns="*", filters=None, page_size=DEFAULT_PAGE_SIZE):
+        """
+        Yields the rows of `table` one at a time, paging with keyset pagination
+        on the unique column `key` (`key=gt.<last seen>`) so every page is an
+        index range scan and no page is ever larger than `page_size`, which
+        must stay under the PostgREST max-rows limit.
+        """
+        if columns != "*" and key not in columns.split(","):
+            columns = f"{columns},{key}"
+        last_key = None
+        while True:
+            page_filters = dict(filters or {})
+            if last_key is not None:
+                page_filters[key] = f"gt.{last_key}"
+            rows = self.select(table, columns=columns, filters=page_filters,
+                               order=f"{key}.asc", limit=page_size)
+            yield from rows
+            if len(rows) < page_size:
+                return
+            last_key = rows[-1][key]
+
+    def insert(self, table, rows):
+        """Inserts one row (dict) or many rows (list of dicts) in a single request."""
+        self._request("POST", table, json=rows, headers={"Prefer": "return=minimal"}, idempotent=False)
+
+    def upsert(self, table, rows, on_conflict=None):
+        """Inserts rows, merging into existing ones that collide on `on_conflict`."""
+        params = {"on_conflict": on_conflict} if on_conflict else None
+        self._request(
+            "POST", table, params=params, json=rows,
+            headers={"Prefer": "resolution=merge-duplicates,return=minimal"},
+        )
+
+    def rpc(self, function, params=None):
+        """Calls a Postgres function and returns its result. Not retried once it may have run."""
+        return self._request("POST", f"rpc/{function}", json=params or {}, idempotent=False).json()
+
+    def upload(self, bucket, path, data, content_type="application/octet-stream"):
+        """Uploads `data` to a Storage bucket, replacing any existing object at `path`."""
+        response = self.session.post(
+            f"{self.storage_url}/object/{bucket}/{path}",
+            data=data,
+            headers={"Content-Type": content_type, "x-upsert": "true"},
+            timeout=self.timeout,
+        )
+        if response.status_code >= 300:
+            raise SupabaseError(response.status_code, response.text)
+
+
+def iter_urls(client, table, filters=None, page_size=DEFAULT_PAGE_SIZE):
+    """
+    Streams the http(s) URLs stored in a `startup_urls`/`grant_urls` style
+    table. `filters` narrows the rows server side, e.g.
+    {"created_at": "gt.2025-01-01T00:00:00Z"} for rows added since a run.
+    """
+    for row in client.select_pages(table, key="url", columns="url", filters=filters, page_size=page_size):
+        url = (row.get("url") or "").strip()
+        if url.startswith("http"):
+            yield url
+
+
+class BatchWriter:
+    """
+    Buffers rows for one table and writes them as array-body bulk inserts of
+    `batch_size` rows. Use as a context manager so the tail is flushed on exit.
+    With `on_conflict` the batches are upserts on that column, and a buffered
+    row is replaced by a later one with the same key, since one upsert can't
+    touch the same record twice.
+
+    Callers mark a source page complete with page_done() right after adding
+    its rows; `on_flush` is then called with the pages whose rows have all
+    been written, so checkpoints never run ahead of the database. Pages with
+    a row in a failed batch are never reported.
+    """
+
+    def __init__(self, client, table, batch_size=DEFAULT_BATCH_SIZE, on_flush=None, on_conflict=None):
+        self.client = client
+        self.table = table
+        self.batch_size = batch_size
+        self.on_flush = on_flush
+        self.on_conflict = on_conflict
+        self.buffer = []
+        self._positions = {}
+        self.pages = []
+        self.written = 0
+        self.failed = 0
+        # Rows are numbered as they are added; pages and failed batches are ranges of those numbers
+        self._added = 0
+        self._flushed = 0
+        self._page_start = 0
+        self._failed_ranges = []
+
+    def add(self, row):
+        self._added += 1
+        if self.on_conflict is not None:
+            key = row.get(self.on_conflict)
+            if key in self._positions:
+                self.buffer[self._positions[key]] = row
+                return
+            self._positions[key] = len(self.buffer)
+        self.buffer.append(row)
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def page_done(self, page):
+        self.pages.append((page, self._page_start, self._added))
+        self._page_start = self._added
+        if not self.buffer:
+            self.flush()
+
+    def _insert(self, rows):
+        started = time.perf_counter()
+        try:
+            if self.on_conflict is not None:
+                self.client.upsert(self.table, rows, on_conflict=self.on_conflict)
+            else:
+                self.client.insert(self.table, rows)
+            self.written += len(rows)
+            metrics.inc("db_rows_total", len(rows), table=self.table, result="written")
+            log.info("Inserted records", extra={"table": self.table, "rows": len(rows)})
+            return True
+        except SupabaseError as e:
+            log.error("Failed to insert records",
+                      extra={"table": self.table, "rows": len(rows), "status": e.status_code, "error": e.text})
+        except Exception as e:
+            log.error("Error inserting records", extra={"table": self.table, "rows": len(rows), "error": str(e)})
+        finally:
+            metrics.observe("db_write_seconds", time.perf_counter() - started, table=self.table)
+        self.failed += len(rows)
+        metrics.inc("db_rows_total", len(rows), table=self.table, result="failed")
+        return False
+
+    def flush(self):
+        rows, self.buffer = self.buffer, []
+        self._positions = {}
+        if rows and not self._insert(rows):
+            self._failed_ranges.append((self._flushed, self._added))
+        self._flushed = self._added
+
+        done = [p for p in self.pages if p[2] <= self._flushed]
+        self.pages = [p for p in self.pages if p[2] > self._flushed]
+        written = [
+            page for page, start, end in done
+            if not any(fail_start < end and start < fail_end for fail_start, fail_end in self._failed_ranges)
+        ]
+        if written and self.on_flush is not None:
+            self.on_flush(written)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
@@ -0,0 +1,67 @@
+"""Shared fakes for the scraper tests; run with `python -m pytest tests` from "python codes"."""
+import json
+import os
+import sys
+
+# The scraper modules are top-level modules in "python codes" (see the pipeline package docstring)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeSupabase:
+    """In-memory stand-in for SupabaseClient with the calls the writers and the pipeline make."""
+
+    def __init__(self, tables=None):
+        self.tables = {name: list(rows) for name, rows in (tables or {}).items()}
+        self.upserts = []
+        self.fail_next = 0
+        self.last_no = 0
+
+    def select_pages(self, table, key, columns="*", filters=None, page_size=None):
+        for row in self.tables.get(table, []):
+            if columns == "*":
+                yield dict(row)
+            else:
+                yield {column: row.get(column) for column in columns.split(",")}
+
+    def _write(self, table, rows):
+        from supabase_client import SupabaseError
+
+        if self.fail_next:
+            self.fail_next -= 1
+            raise SupabaseError(500, "boom")
+        if len({frozenset(row) for row in rows}) > 1:
+            raise SupabaseError(400, "All object keys must match")
+        self.tables.setdefault(table, []).extend(dict(row) for row in rows)
+
+    def insert(self, table, rows):
+        self._write(table, rows)
+
+    def upsert(self, table, rows, on_conflict=None):
+        self.upserts.append((table, [dict(row) for row in rows]))
+        self._write(table, rows)
+
+    def rpc(self, function, params=None):
+        first = self.last_no + 1
+        self.last_no += params["block_size"]
+        return first
+
+    def upload(self, bucket, path, data):
+        pass
+
+
+class FakeChat:
+    """ChatClient stand-in: answers every call with the function-call arguments in `answer`."""
+
+    def __init__(self, answer):
+        self.answer = answer
+        self.calls = []
+        self.error = None  # Raised instead of answering, like a call that failed all its retries
+
+    def complete_sync(self, messages, **params):
+        self.calls.append(messages)
+        if self.error is not None:
+            raise self.error
+        return json.dumps(self.answer)
+
+    def stats(self):
+        return {"calls": len(self.calls)}
@@ -0,0 +1,50 @@
+from conftest import FakeSupabase
+from supabase_client import BatchWriter
+
+
+def test_pages_with_a_row_in_a_failed_batch_are_not_reported():
+    client = FakeSupabase()
+    flushed = []
+    writer = BatchWriter(client, "t", batch_size=2, on_flush=flushed.extend)
+
+    writer.add({"id": 1})
+    writer.page_done("a")
+    client.fail_next = 1
+    writer.add({"id": 2})  # Fills the first batch, which fails
+    writer.add({"id": 3})
+    writer.page_done("b")  # Rows in the failed batch and the next one
+    writer.add({"id": 4})
+    writer.page_done("c")
+    writer.flush()
+
+    assert flushed == ["c"]
+    assert writer.failed == 2
+    assert writer.written == 2
+    assert [row["id"] for row in client.tables["t"]] == [3, 4]
+
+
+def test_page_without_rows_is_reported_once_earlier_rows_are_written():
+    flushed = []
+    writer = BatchWriter(FakeSupabase(), "t", batch_size=10, on_flush=flushed.extend)
+
+    writer.add({"id": 1})
+    writer.page_done("a")
+    writer.page_done("empty")
+    assert flushed == []
+    writer.flush()
+    assert flushed == ["a", "empty"]
+
+
+def test_later_row_with_the_same_key_replaces_the_buffered_one():
+    client = FakeSupabase()
+    flushed = []
+    with BatchWriter(client, "t", batch_size=3, on_flush=flushed.extend, on_conflict="key") as writer:
+        writer.add({"key": "x", "value": 1})
+        writer.add({"key": "y", "value": 1})
+        writer.page_done("a")
+        writer.add({"key": "x", "value": 2})
+        writer.page_done("b")
+        assert len(writer.buffer) == 2
+
+    assert client.upserts == [("t", [{"key": "x", "value": 2}, {"key": "y", "value": 1}])]
+    assert flushed == ["a", "b"]
@@ -0,0 +1,50 @@
+import pytest
+
+import chunking
+from chunking import chunk_text, merge_entries
+from telemetry import metrics
+
+
+@pytest.fixture(autouse=True)
+def estimated_tokens(monkeypatch):
+    # The characters-per-token estimate, so the tests don't depend on tiktoken or its BPE download
+    monkeypatch.setitem(chunking._encoders, "gpt-3.5-turbo", None)
+
+
+def test_short_text_is_one_chunk():
+    assert chunk_text("a few words") == ["a few words"]
+    assert chunk_text("") == []
+
+
+def test_chunks_overlap_and_cut_on_spaces():
+    words = [f"w{i:03d}" for i in range(200)]
+    chunks = chunk_text(" ".join(words), max_tokens=50, overlap_tokens=10)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(chunk) <= 50 * chunking.CHARS_PER_TOKEN
+        assert all(word in words for word in chunk.split())
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split()[0] in previous.split()
+    assert chunks[-1].split()[-1] == words[-1]
+
+
+def test_text_past_max_chunks_is_dropped_and_counted():
+    metrics.reset()
+    chunks = chunk_text("word " * 1000, max_tokens=20, overlap_tokens=0, max_chunks=3)
+
+    assert len(chunks) == 3
+    assert metrics.value("content_truncated_total", limit="max_chunks") == 1
+
+
+def test_merge_entries_joins_name_variants():
+    merged = merge_entries([
+        {"CompanyName": "Acme Sdn. Bhd.", "Sector": "Not defined"},
+        {"CompanyName": "ACME", "Sector": "Fintech"},
+        {"CompanyName": "Other", "Sector": "AI"},
+    ], ("CompanyName",))
+
+    assert merged == [
+        {"CompanyName": "Acme Sdn. Bhd.", "Sector": "Fintech"},
+        {"CompanyName": "Other", "Sector": "AI"},
+    ]
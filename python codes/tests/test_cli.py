@@ -0,0 +1,35 @@
+import pytest
+
+from conftest import FakeSupabase
+from pipeline import PROFILES, cli, runner
+
+
+@pytest.fixture
+def crawls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(runner.Pipeline, "crawl", lambda self, **kwargs: calls.append(kwargs))
+    monkeypatch.setattr(runner.Pipeline, "close", lambda self, metrics_path=None: None)
+    return calls
+
+
+def test_since_and_filters_narrow_the_url_table(crawls):
+    cli.main(["crawl", "grant", "--since", "2025-01-01T00:00:00Z", "--filter", "url=like.*.my*"])
+
+    assert crawls[0]["url_filters"] == {"created_at": "gt.2025-01-01T00:00:00Z", "url": "like.*.my*"}
+
+
+def test_malformed_filter_is_rejected(crawls):
+    with pytest.raises(SystemExit):
+        cli.main(["crawl", "grant", "--filter", "url"])
+    assert crawls == []
+
+
+def test_crawl_filters_reach_the_url_query(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    client = FakeSupabase()
+    queried = []
+    client.select_pages = lambda table, key, columns="*", filters=None, page_size=None: queried.append(filters) or []
+
+    runner.Pipeline(PROFILES["grant"], supabase=client).crawl(url_filters={"created_at": "gt.2025-01-01T00:00:00Z"})
+
+    assert queried == [{"created_at": "gt.2025-01-01T00:00:00Z"}]
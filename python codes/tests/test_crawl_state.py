@@ -0,0 +1,73 @@
+import pytest
+
+import crawl_state
+from crawl_state import CHANGED, FAILED, UNCHANGED, CrawlStateStore
+
+URL = "https://acme.example"
+NOW = 1_000_000_000.0
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "crawl_state.sqlite3"))
+    yield store
+    store.close()
+
+
+def schedule(store, url=URL):
+    return store._db.execute(
+        "SELECT interval, next_due, visits, changes, failures FROM schedule WHERE url = ?", (url,)
+    ).fetchone()
+
+
+def test_unvisited_urls_are_due(store):
+    assert store.is_due(URL, NOW)
+
+
+def test_first_visit_keeps_the_default_interval(store):
+    store.record_visit(URL, CHANGED, now=NOW)
+
+    interval, next_due, visits, changes, _ = schedule(store)
+    assert interval == crawl_state.DEFAULT_RECRAWL_INTERVAL
+    assert next_due == NOW + interval
+    assert (visits, changes) == (1, 0)
+    assert not store.is_due(URL, NOW)
+    assert store.is_due(URL, next_due - crawl_state.SCHEDULE_SLACK)
+
+
+def test_unchanged_pages_back_off_and_changed_ones_speed_up(store):
+    store.record_visit(URL, CHANGED, now=NOW)
+    store.record_visit(URL, UNCHANGED, now=NOW)
+    assert schedule(store)[0] == crawl_state.DEFAULT_RECRAWL_INTERVAL * crawl_state.UNCHANGED_BACKOFF
+
+    for _ in range(20):
+        store.record_visit(URL, UNCHANGED, now=NOW)
+    assert schedule(store)[0] == crawl_state.MAX_RECRAWL_INTERVAL
+
+    for _ in range(20):
+        store.record_visit(URL, CHANGED, now=NOW)
+    interval, _, _, changes, _ = schedule(store)
+    assert interval == crawl_state.MIN_RECRAWL_INTERVAL
+    assert changes == 20
+
+
+def test_failures_back_off_exponentially_without_touching_the_interval(store):
+    store.record_visit(URL, CHANGED, now=NOW)
+    waits = []
+    for _ in range(3):
+        store.record_visit(URL, FAILED, now=NOW)
+        interval, next_due, _, _, failures = schedule(store)
+        waits.append(next_due - NOW)
+    assert waits == [crawl_state.MIN_RECRAWL_INTERVAL * factor for factor in (1, 2, 4)]
+    assert interval == crawl_state.DEFAULT_RECRAWL_INTERVAL
+    assert failures == 3
+
+    store.record_visit(URL, UNCHANGED, now=NOW)
+    assert schedule(store)[4] == 0
+
+
+def test_due_lets_through_only_due_urls_in_order(store):
+    store.record_visit("https://b.example", CHANGED, now=NOW)
+
+    urls = ["https://a.example", "https://b.example", "https://c.example"]
+    assert list(store.due(iter(urls), now=NOW)) == ["https://a.example", "https://c.example"]
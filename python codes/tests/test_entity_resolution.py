@@ -0,0 +1,80 @@
+from conftest import FakeSupabase
+from dedup import UpsertWriter
+from pipeline import PROFILES
+
+STARTUP = PROFILES["startup"]
+
+
+def test_name_variants_on_the_same_site_merge():
+    resolver = STARTUP.resolver()
+    first = resolver.add({"CompanyName": "Acme Sdn Bhd", "WebsiteSocialMedia": "https://www.acme.com/",
+                          "WhatTheyDo": "AI tutoring for schools"})
+    second = resolver.add({"CompanyName": "ACME", "WebsiteSocialMedia": "acme.com",
+                           "WhatTheyDo": "AI tutoring for primary and secondary schools"})
+
+    assert second is first
+    assert resolver.merged == 1
+    # Key fields keep the first value, other fields the longest
+    assert second["CompanyName"] == "Acme Sdn Bhd"
+    assert second["WhatTheyDo"] == "AI tutoring for primary and secondary schools"
+
+
+def test_different_websites_stay_apart():
+    resolver = STARTUP.resolver()
+    resolver.add({"CompanyName": "Acme", "WebsiteSocialMedia": "acme.com", "WhatTheyDo": "AI tutoring"})
+    resolver.add({"CompanyName": "Acme", "WebsiteSocialMedia": "acme.my", "WhatTheyDo": "AI tutoring"})
+
+    assert len(resolver.clusters) == 2
+
+
+def test_same_dedup_key_merges_even_when_lsh_misses():
+    resolver = STARTUP.resolver()
+    first = resolver.add({"CompanyName": "Acme", "WebsiteSocialMedia": "acme.com",
+                          "WhatTheyDo": "drones for oil palm plantations in Sabah and Sarawak"})
+    second = resolver.add({"CompanyName": "ACME Sdn Bhd", "WebsiteSocialMedia": "https://www.acme.com/",
+                           "WhatTheyDo": "payments wallet for hawkers and night markets"})
+
+    assert second is first
+    assert len(resolver.clusters) == 1
+
+
+def test_no_data_rows_pass_through():
+    resolver = STARTUP.resolver()
+    row = {"CompanyName": "No data", "WebsiteSocialMedia": "https://a.example"}
+
+    assert resolver.add(row) is row
+    assert resolver.clusters == []
+
+
+def test_variants_found_later_update_the_stored_record():
+    client = FakeSupabase({"startup": [{
+        "No": 7, "dedup_key": "acme.com|acme", "content_hash": "old",
+        "CompanyName": "Acme", "WebsiteSocialMedia": "acme.com", "WhatTheyDo": "AI tutoring", "Sector": "AI",
+    }]})
+    writer = UpsertWriter(client, "startup", STARTUP.key, 10, resolver=STARTUP.resolver())
+
+    writer.add({"CompanyName": "ACME Sdn Bhd", "WebsiteSocialMedia": "https://www.acme.com/",
+                "WhatTheyDo": "Tutoring app", "Sector": "EdTech"})
+
+    assert writer.buffer == [{
+        "CompanyName": "Acme", "WebsiteSocialMedia": "acme.com", "WhatTheyDo": "Tutoring app", "Sector": "EdTech",
+        "dedup_key": "acme.com|acme", "content_hash": writer.buffer[0]["content_hash"],
+    }]
+
+
+def test_matched_and_new_rows_share_one_column_set():
+    from pipeline.profiles import map_startup_entry
+
+    client = FakeSupabase({"startup": [{
+        "No": 7, "dedup_key": "acme.com|acme", "content_hash": "old",
+        "CompanyName": "Acme", "WebsiteSocialMedia": "acme.com", "WhatTheyDo": "AI tutoring", "Sector": "AI",
+    }]})
+    with STARTUP.writer(client, 10, None) as writer:
+        writer.add(map_startup_entry({"CompanyName": "ACME Sdn Bhd", "WebsiteSocialMedia": "acme.com",
+                                      "WhatTheyDo": "Tutoring app"}))
+        writer.add(map_startup_entry({"CompanyName": "Other", "WebsiteSocialMedia": "other.my"}))
+        matched, new = writer.buffer
+        assert set(matched) == set(new)
+        assert matched["No"] == 7 and matched["ProblemTheySolve"] == "Not defined"
+
+    assert writer.written == 2 and writer.failed == 0
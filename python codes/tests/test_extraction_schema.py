@@ -0,0 +1,34 @@
+import json
+
+from extraction_schema import GRANT_FUNCTION, STARTUP_FUNCTION, parse_arguments
+
+
+def test_values_are_coerced_and_unknown_keys_dropped():
+    arguments = json.dumps({"startups": [{
+        "CompanyName": " Acme ",
+        "YearFounded": "Founded in 2019",
+        "Sector": ["AI", "Fintech"],
+        "Valuation": "1B",
+    }]})
+
+    assert parse_arguments(arguments, STARTUP_FUNCTION) == [
+        {"CompanyName": "Acme", "YearFounded": 2019, "Sector": "AI, Fintech"}
+    ]
+
+
+def test_items_missing_a_required_field_are_skipped():
+    arguments = json.dumps({"programs": [{"fund_name": "Seed"}, {"company_name": "Cradle", "fund_name": ""}]})
+
+    assert parse_arguments(arguments, GRANT_FUNCTION) == [{"company_name": "Cradle"}]
+
+
+def test_a_single_object_is_one_item():
+    assert parse_arguments(json.dumps({"startups": {"CompanyName": "Acme"}}), STARTUP_FUNCTION) == [
+        {"CompanyName": "Acme"}
+    ]
+
+
+def test_invalid_json_gives_no_entries():
+    assert parse_arguments("{not json", STARTUP_FUNCTION) == []
+    assert parse_arguments(None, STARTUP_FUNCTION) == []
+    assert parse_arguments(json.dumps({"startups": "none"}), STARTUP_FUNCTION) == []
@@ -0,0 +1,97 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from crawl_state import CrawlStateStore, validators
+from fetcher import fetch_page, scrape_many, scrape_website
+
+
+class Site(BaseHTTPRequestHandler):
+    etag = '"v1"'
+    body = b"<html><head><title>Acme</title></head><body><p>Acme builds drones</p></body></html>"
+    conditional = []
+    requests = []
+
+    def do_GET(self):
+        Site.requests.append((self.server.server_port, time.monotonic()))
+        Site.conditional.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == Site.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("ETag", Site.etag)
+        self.send_header("Content-Length", str(len(Site.body)))
+        self.end_headers()
+        self.wfile.write(Site.body)
+
+    def log_message(self, *args):
+        pass
+
+
+def serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def url():
+    Site.etag, Site.conditional, Site.requests = '"v1"', [], []
+    server = serve()
+    yield f"http://127.0.0.1:{server.server_port}/"
+    server.shutdown()
+
+
+@pytest.fixture
+def state(tmp_path):
+    store = CrawlStateStore(str(tmp_path / "crawl_state.sqlite3"))
+    yield store
+    store.close()
+
+
+def test_first_fetch_is_unconditional_and_returns_the_validators(url, state):
+    raw = fetch_page(url, state=state)
+
+    assert Site.conditional == [None]
+    assert raw["etag"] == '"v1"'
+    assert raw["previous_fingerprint"] is None
+
+
+def test_stored_etag_is_sent_and_a_304_is_unchanged(url, state):
+    state.record(validators(scrape_website(url, state=state)))
+
+    assert fetch_page(url, state=state) == {"url": url, "unchanged": True}
+    assert Site.conditional == [None, '"v1"']
+
+
+def test_same_text_under_a_new_etag_is_unchanged_but_carries_the_new_etag(url, state):
+    first = scrape_website(url, state=state)
+    state.record(validators(first))
+    Site.etag = '"v2"'
+
+    result = scrape_website(url, state=state)
+
+    assert result["unchanged"]
+    assert result["etag"] == '"v2"'
+    assert result["fingerprint"] == first["fingerprint"]
+
+
+def test_a_busy_host_does_not_hold_up_the_others(url):
+    other = serve()
+    try:
+        # Keyset order: one host's URLs in a contiguous run, more of them than there are fetch slots
+        urls = [f"{url}?page={i}" for i in range(4)] + [f"http://127.0.0.1:{other.server_port}/"]
+        started = time.monotonic()
+        results = dict(scrape_many(urls, max_concurrency=2, per_host_delay=0.3, parse_workers=0))
+    finally:
+        other.shutdown()
+
+    assert all(results[u] for u in urls)
+    busy = [at for port, at in Site.requests if port != other.server_port]
+    [idle] = [at for port, at in Site.requests if port == other.server_port]
+    assert idle - started < 0.25
+    assert all(later - earlier >= 0.29 for earlier, later in zip(busy, busy[1:]))
@@ -0,0 +1,72 @@
+import pytest
+
+import gpt_cache
+from gpt_cache import CompletionCache, make_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(gpt_cache.time, "time", clock.time)
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "gpt_cache.sqlite3")
+
+
+def test_key_covers_model_messages_and_params():
+    messages = [{"role": "user", "content": "page"}]
+
+    assert make_key("m", messages, temperature=0.3) == make_key("m", list(messages), temperature=0.3)
+    assert make_key("m", messages, temperature=0.3) != make_key("m", messages, temperature=0.5)
+    assert make_key("m", messages) != make_key("other", messages)
+
+
+def test_entries_expire_after_the_ttl(clock, path):
+    cache = CompletionCache(path, ttl=100)
+    cache.set("k", "answer")
+
+    clock.now += 100
+    assert cache.get("k") == "answer"
+    clock.now += 1
+    assert cache.get("k") is None
+    assert cache.stats() == {"hits": 1, "misses": 1}
+    cache.close()
+
+
+def test_eviction_keeps_the_most_recently_used_entries(clock, path, monkeypatch):
+    monkeypatch.setattr(gpt_cache, "EVICT_EVERY", 1)
+    cache = CompletionCache(path, max_entries=2)
+    for key in ("a", "b"):
+        cache.set(key, key)
+        clock.now += 1
+    cache.get("a")  # Now more recently used than b
+    clock.now += 1
+    cache.set("c", "c")
+
+    assert [cache.get(key) for key in ("a", "b", "c")] == ["a", None, "c"]
+    cache.close()
+
+
+def test_entries_survive_a_restart_and_stale_ones_are_purged_on_close(clock, path):
+    cache = CompletionCache(path, ttl=100)
+    cache.set("old", "1")
+    clock.now += 60
+    cache.set("new", "2")
+    clock.now += 50
+    cache.close()
+
+    cache = CompletionCache(path, ttl=100)
+    assert cache.get("new") == "2"
+    assert cache._db.execute("SELECT key FROM completions").fetchall() == [("new",)]
+    cache.close()
@@ -0,0 +1,34 @@
+import importlib
+
+import pytest
+
+from html_text import BACKENDS, extract_text
+
+
+def installed(name):
+    try:
+        importlib.import_module(BACKENDS[name][0])
+    except ImportError:
+        return False
+    return True
+
+
+backends = pytest.mark.parametrize("backend", [
+    pytest.param(name, marks=pytest.mark.skipif(not installed(name), reason=f"{name} not installed"))
+    for name in BACKENDS
+])
+
+
+@backends
+def test_xhtml_with_an_encoding_declaration(backend):
+    html = ('<?xml version="1.0" encoding="utf-8"?>\n'
+            '<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Acme</title></head>'
+            '<body><nav>Menu</nav><p>Builds  drones</p><script>var x;</script></body></html>')
+
+    assert extract_text(html, backend) == ("Acme", "Builds drones")
+
+
+@backends
+@pytest.mark.parametrize("html", ["", "  \n", "<!-- nothing here -->", '<?xml version="1.0"?>'])
+def test_documents_without_content(backend, html):
+    assert extract_text(html, backend) == ("", "")
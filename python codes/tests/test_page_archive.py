@@ -0,0 +1,78 @@
+import gzip
+import os
+
+import pytest
+
+from page_archive import EXTENSIONS, PageArchive, make_record, parse_record
+
+HEADERS = {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"', "Content-Encoding": "gzip"}
+
+
+@pytest.fixture(params=["gzip", "zstd"])
+def codec(request):
+    if request.param == "zstd":
+        pytest.importorskip("zstandard")
+    return request.param
+
+
+def test_record_round_trip():
+    record = parse_record(make_record("https://acme.example/", 200, HEADERS, b"<p>caf\xc3\xa9</p>", date=86400))
+
+    assert record == {
+        "url": "https://acme.example/",
+        "date": "1970-01-02T00:00:00Z",
+        "status": 200,
+        # The stored body is already decoded, so transfer headers would describe it wrongly
+        "headers": {"Content-Type": "text/html; charset=utf-8", "ETag": '"v1"'},
+        "body": b"<p>caf\xc3\xa9</p>",
+    }
+
+
+def test_pages_are_read_back_across_segment_rollover(tmp_path, codec):
+    archive = PageArchive(str(tmp_path), compression=codec, segment_max_bytes=300)
+    for i in range(6):
+        archive.write(f"https://acme.example/{i}", 200, HEADERS, f"page {i} ".encode() * 20)
+    archive.write("https://acme.example/0", 200, HEADERS, b"page 0, second visit")
+
+    segments = sorted(name for name in os.listdir(tmp_path) if name.endswith(EXTENSIONS[codec]))
+    assert len(segments) > 1
+    for i in range(1, 6):
+        assert archive.get(f"https://acme.example/{i}")["body"] == f"page {i} ".encode() * 20
+    assert archive.get("https://acme.example/0")["body"] == b"page 0, second visit"
+    assert archive.get("https://other.example/") is None
+    assert len(archive.urls()) == 6
+    archive.close()
+
+    # A reopened archive appends to a new or the last segment and still finds everything
+    archive = PageArchive(str(tmp_path), compression=codec, segment_max_bytes=300)
+    archive.write("https://acme.example/6", 200, HEADERS, b"page 6")
+    assert archive.get("https://acme.example/6")["body"] == b"page 6"
+    assert archive.get("https://acme.example/3")["body"] == b"page 3 " * 20
+    archive.close()
+
+
+def test_gzip_segments_are_plain_warc_gz(tmp_path):
+    archive = PageArchive(str(tmp_path), compression="gzip")
+    archive.write("https://a.example/", 200, HEADERS, b"a")
+    archive.write("https://b.example/", 404, {}, b"")
+    archive.close()
+
+    [segment] = [name for name in os.listdir(tmp_path) if name.endswith(".warc.gz")]
+    with open(tmp_path / segment, "rb") as f:
+        data = gzip.decompress(f.read())
+    assert data.count(b"WARC/1.0\r\n") == 2
+    assert b"HTTP/1.1 404 Not Found" in data
+
+
+def test_fetch_page_reads_the_archive_like_the_network(tmp_path):
+    archive = PageArchive(str(tmp_path), compression="gzip")
+    archive.write("https://acme.example/", 200, HEADERS, b"<p>hi</p>", final_url="https://www.acme.example/")
+
+    raw = archive.fetch_page("https://acme.example/")
+
+    assert raw["body"] == b"<p>hi</p>"
+    assert raw["encoding"] == "utf-8"
+    assert raw["etag"] == '"v1"'
+    assert raw["final_url"] == "https://www.acme.example/"
+    assert archive.fetch_page("https://missing.example/") is None
+    archive.close()
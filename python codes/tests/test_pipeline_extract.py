@@ -0,0 +1,45 @@
+import pytest
+
+from conftest import FakeChat
+from gpt_cache import CompletionCache
+from pipeline import PROFILES, Pipeline, runner
+
+STARTUP = PROFILES["startup"]
+PAGE = {"url": "https://acme.example", "title": "Acme", "content": "first half | second half"}
+
+
+class PartialChat(FakeChat):
+    """Answers the first chunk only, as when the model returns no content for the rest."""
+
+    def complete_sync(self, messages, **params):
+        answer = super().complete_sync(messages, **params)
+        return answer if "first half" in messages[-1]["content"] else ""
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(runner, "chunk_text", lambda text: text.split(" | ") if text else [])
+    pipeline = Pipeline(STARTUP, chat_client=PartialChat({"startups": [{"CompanyName": "Acme"}]}),
+                        gpt_cache=CompletionCache(str(tmp_path / "gpt_cache.sqlite3")))
+    yield pipeline
+    pipeline.close()
+
+
+def test_page_counts_as_extracted_only_when_every_chunk_is_answered(pipeline):
+    responded, entries = pipeline.extract_page(PAGE)
+
+    assert not responded
+    assert entries == [{"CompanyName": "Acme"}]
+    # The answered chunk's entries are kept; the page just isn't marked as done
+    assert [row["CompanyName"] for row in STARTUP.rows(PAGE["url"], PAGE, responded, entries)] == ["Acme"]
+
+
+def test_page_without_text_is_not_sent_to_the_model(pipeline):
+    page = dict(PAGE, content="  ")
+
+    responded, entries = pipeline.extract_page(page)
+
+    assert (responded, entries) == (False, [])
+    assert pipeline.chat_client.calls == []
+    assert STARTUP.rows(page["url"], page, responded, entries)[0]["WhatTheyDo"] == "Page has no text content."
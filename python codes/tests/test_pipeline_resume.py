@@ -0,0 +1,86 @@
+import sqlite3
+
+import pytest
+
+from conftest import FakeChat, FakeSupabase
+from gpt_cache import CompletionCache
+from pipeline import PROFILES, Pipeline
+from pipeline.profiles import map_startup_entry
+from run_journal import EXTRACTED, FETCHED, PERSISTED, RunJournal
+
+EXTRACTED_URL = "https://extracted.example"
+FETCHED_URL = "https://fetched.example"
+
+
+@pytest.fixture
+def pipeline(tmp_path, monkeypatch):
+    # Journals and crawl state are created in the working directory
+    monkeypatch.chdir(tmp_path)
+    client = FakeSupabase({"startup_urls": [{"url": EXTRACTED_URL}, {"url": FETCHED_URL}]})
+    chat = FakeChat({"startups": [{"CompanyName": "Fetched Co", "WebsiteSocialMedia": "fetched.example"}]})
+    pipeline = Pipeline(PROFILES["startup"], supabase=client, chat_client=chat,
+                        gpt_cache=CompletionCache(str(tmp_path / "gpt_cache.sqlite3")))
+    yield pipeline
+    pipeline.close()
+
+
+def interrupted_run(profile):
+    """A journal left by a run that died after extracting one page and fetching another."""
+    journal = RunJournal(profile.journal_path)
+    row = map_startup_entry({"CompanyName": "Extracted Co", "WebsiteSocialMedia": "extracted.example"})
+    journal.mark(EXTRACTED_URL, EXTRACTED, {"rows": [row], "state": {"url": EXTRACTED_URL, "fingerprint": "e"}})
+    journal.mark(FETCHED_URL, FETCHED, {"url": FETCHED_URL, "title": "Fetched", "content": "Fetched Co builds apps",
+                                        "etag": '"v1"', "fingerprint": "f"})
+
+
+def test_resume_finishes_extracted_and_fetched_pages_without_refetching(pipeline):
+    interrupted_run(pipeline.profile)
+
+    pipeline.crawl(resume=True)
+
+    stored = {row["CompanyName"]: row for row in pipeline.supabase.tables["startup"]}
+    assert set(stored) == {"Extracted Co", "Fetched Co"}
+    assert sorted(row["No"] for row in stored.values()) == [1, 2]
+    # Only the fetched page needed the model; nothing was fetched again
+    assert len(pipeline.chat_client.calls) == 1
+    assert pipeline.crawl_state.get(EXTRACTED_URL)["fingerprint"] == "e"
+    assert pipeline.crawl_state.get(FETCHED_URL)["etag"] == '"v1"'
+    finished = sqlite3.connect(pipeline.profile.journal_path).execute("SELECT finished_at FROM runs").fetchall()
+    assert finished[0][0] is not None
+
+
+def test_failed_batch_keeps_pages_for_the_next_resume(pipeline):
+    interrupted_run(pipeline.profile)
+    pipeline.supabase.fail_next = 1
+    pipeline.crawl(resume=True)
+
+    journal = RunJournal(pipeline.profile.journal_path, resume=True)
+    assert {url for url, _ in journal.pending(EXTRACTED)} == {EXTRACTED_URL, FETCHED_URL}
+    assert journal.stage(FETCHED_URL) != PERSISTED
+    assert pipeline.crawl_state.get(FETCHED_URL) is None
+    # Not rescheduled either, so a fresh run still visits it
+    assert pipeline.crawl_state.is_due(FETCHED_URL)
+
+    pipeline.supabase.fail_next = 0
+    pipeline.flush()
+
+    assert not pipeline.crawl_state.is_due(FETCHED_URL)
+
+    assert {row["CompanyName"] for row in pipeline.supabase.tables["startup"]} == {"Extracted Co", "Fetched Co"}
+    assert len(pipeline.chat_client.calls) == 1
+
+
+def test_model_failure_leaves_the_page_for_resume(pipeline):
+    interrupted_run(pipeline.profile)
+    pipeline.chat_client.error = RuntimeError("RateLimitError")
+    pipeline.crawl(resume=True)
+
+    # No "Empty response" placeholder; the page waits at FETCHED and the run stays open
+    assert {row["CompanyName"] for row in pipeline.supabase.tables["startup"]} == {"Extracted Co"}
+    journal = RunJournal(pipeline.profile.journal_path, resume=True)
+    assert journal.stage(FETCHED_URL) == FETCHED
+
+    pipeline.chat_client.error = None
+    pipeline.crawl(resume=True)
+
+    assert {row["CompanyName"] for row in pipeline.supabase.tables["startup"]} == {"Extracted Co", "Fetched Co"}
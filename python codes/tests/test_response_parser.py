@@ -0,0 +1,70 @@
+import json
+
+from response_parser import GRANT_FIELDS, parse_grants, parse_startups, reparse
+
+STARTUPS = """\
+**CompanyName:** XYZ Tech
+**WhatTheyDo:** Creates AI-powered tools
+for education
+**sector:** EdTech
+
+**CompanyName:** Acme
+- **Location:** Penang
+---
+Some closing remark without fields
+"""
+
+GRANTS = """\
+Cradle Fund
+company_name: Cradle Fund Sdn Bhd
+website_url: https://cradle.my (official site)
+description_services: Early-stage funding
+  for tech startups
+program_participation:
+1. CIP Spark - grants up to RM150k
+   for prototypes
+2. CIP Sprint: commercialisation grants
+
+contact_info: info@cradle.my
+"""
+
+
+def test_startups_split_on_company_name_and_separators():
+    assert parse_startups(STARTUPS) == [
+        {"CompanyName": "XYZ Tech", "WhatTheyDo": "Creates AI-powered tools for education", "Sector": "EdTech"},
+        {"CompanyName": "Acme", "Location": "Penang"},
+    ]
+
+
+def test_startup_blocks_without_a_company_name_are_dropped():
+    assert parse_startups("**Sector:** Fintech\n---\n**Location:** KL") == []
+
+
+def test_each_listed_fund_becomes_an_entry_sharing_the_company_details():
+    entries = parse_grants(GRANTS, "https://source.example")
+
+    assert [(e["fund_name"], e["program_participation"]) for e in entries] == [
+        ("CIP Spark", "grants up to RM150k for prototypes"),
+        ("CIP Sprint", "commercialisation grants"),
+    ]
+    for entry in entries:
+        assert set(entry) == set(GRANT_FIELDS)
+        assert entry["company_name"] == "Cradle Fund Sdn Bhd"
+        assert entry["website_url"] == "https://cradle.my"
+        assert entry["description_services"] == "Early-stage funding for tech startups"
+        assert entry["contact_info"] == "info@cradle.my"
+        assert entry["industry_sector"] == "Not specified"
+
+
+def test_grant_without_details_falls_back_to_the_first_line_and_source_url():
+    [entry] = parse_grants("MDV (Malaysia Debt Ventures)\nSome text", "https://mdv.com.my")
+
+    assert entry["company_name"] == "MDV"
+    assert entry["website_url"] == "https://mdv.com.my"
+    assert entry["fund_name"] == "Not specified"
+
+
+def test_reparse_reads_json_lines():
+    lines = [json.dumps({"url": "https://a.example", "response": "**CompanyName:** A"}), ""]
+
+    assert list(reparse(lines, "startup")) == [{"url": "https://a.example", "entries": [{"CompanyName": "A"}]}]
@@ -0,0 +1,59 @@
+import pytest
+
+from retrieval_index import MAGIC, STARTUP_INDEX_FIELDS, RetrievalIndex, _header
+
+ROWS = [
+    {"No": 1, "WhatTheyDo": "AI tutoring for primary schools", "Sector": "Education", "ProblemTheySolve": ""},
+    {"No": 2, "WhatTheyDo": "Drones for oil palm plantations", "Sector": "Agriculture", "ProblemTheySolve": None},
+    {"No": 3, "WhatTheyDo": "Payments wallet for hawkers", "Sector": "Fintech",
+     "ProblemTheySolve": "Cash-only hawkers can't take payments online"},
+    {"No": 4, "WhatTheyDo": "", "Sector": "", "ProblemTheySolve": ""},  # Nothing to index
+]
+
+
+@pytest.fixture
+def index():
+    return RetrievalIndex.build(ROWS, "startup", "No", STARTUP_INDEX_FIELDS)
+
+
+def test_query_ranks_matching_rows_first(index):
+    results = index.query("payments for hawkers")
+
+    assert [row_id for row_id, _ in results] == [3]
+    assert 0 < results[0][1] <= 1.0001
+    assert [row_id for row_id, _ in index.query("AI schools and oil palm drones", k=1)] in ([1], [2])
+    assert index.query("quantum") == []
+
+
+def test_rows_without_text_are_left_out(index):
+    assert list(index.ids) == [1, 2, 3]
+
+
+def test_round_trip_through_bytes(index):
+    data = index.to_bytes()
+    loaded = RetrievalIndex.from_bytes(data)
+
+    header_len = _header.unpack_from(data)[2]
+    assert (_header.size + header_len) % 4 == 0  # Arrays start 4-byte aligned for typed-array views
+    assert (loaded.table, loaded.id_column, loaded.fields) == ("startup", "No", STARTUP_INDEX_FIELDS)
+    assert loaded.terms == index.terms
+    assert list(loaded.ids) == list(index.ids)
+    assert list(loaded.term_ptr) == list(index.term_ptr)
+    assert list(loaded.doc_ids) == list(index.doc_ids)
+    assert list(loaded.weights) == list(index.weights)
+    for text in ("payments for hawkers", "AI tutoring", "oil palm"):
+        assert loaded.query(text) == index.query(text)
+
+
+def test_other_data_is_rejected(index):
+    data = index.to_bytes()
+
+    with pytest.raises(ValueError):
+        RetrievalIndex.from_bytes(b"XXXX" + data[len(MAGIC):])
+
+
+def test_save_and_load(index, tmp_path):
+    path = str(tmp_path / "startup.idx")
+    index.save(path)
+
+    assert RetrievalIndex.load(path).query("wallet") == index.query("wallet")
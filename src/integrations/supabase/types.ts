@@ -13,6 +13,8 @@ export type Database = {
         Row: {
           company_name: string | null
           contact_info: string | null
+          content_hash: string | null
+          dedup_key: string | null
           description_services: string | null
           fund_name: string | null
           id: number
@@ -25,6 +27,8 @@ export type Database = {
         Insert: {
           company_name?: string | null
           contact_info?: string | null
+          content_hash?: string | null
+          dedup_key?: string | null
           description_services?: string | null
           fund_name?: string | null
           id?: number
@@ -37,6 +41,8 @@ export type Database = {
         Update: {
           company_name?: string | null
           contact_info?: string | null
+          content_hash?: string | null
+          dedup_key?: string | null
           description_services?: string | null
           fund_name?: string | null
           id?: number
@@ -110,6 +116,8 @@ export type Database = {
           WebsiteSocialMedia: string | null
           WhatTheyDo: string | null
           YearFounded: number | null
+          content_hash: string | null
+          dedup_key: string | null
         }
         Insert: {
           Awards?: string | null
@@ -127,6 +135,8 @@ export type Database = {
           WebsiteSocialMedia?: string | null
           WhatTheyDo?: string | null
           YearFounded?: number | null
+          content_hash?: string | null
+          dedup_key?: string | null
         }
         Update: {
           Awards?: string | null
@@ -144,6 +154,8 @@ export type Database = {
           WebsiteSocialMedia?: string | null
           WhatTheyDo?: string | null
           YearFounded?: number | null
+          content_hash?: string | null
+          dedup_key?: string | null
         }
         Relationships: []
       }
@@ -167,7 +179,10 @@ export type Database = {
       [_ in never]: never
     }
     Functions: {
-      [_ in never]: never
+      reserve_startup_numbers: {
+        Args: { block_size: number }
+        Returns: number
+      }
     }
     Enums: {
       [_ in never]: never
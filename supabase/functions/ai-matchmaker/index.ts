@@ -12,6 +12,100 @@ const corsHeaders = {
   'Access-Control-Allow-Headers': 'authorization, x-client-info, apikey, content-type',
 };
 
+// TF-IDF indexes published by the Python scrapers (python codes/retrieval_index.py)
+const INDEX_BUCKET = 'retrieval-index';
+const SHORTLIST_SIZE = 25;
+const INDEX_TTL_MS = 10 * 60 * 1000;
+
+type RetrievalIndex = {
+  idColumn: string;
+  terms: Map<string, number>;
+  stopwords: Set<string>;
+  ids: Int32Array;
+  idf: Float32Array;
+  termPtr: Uint32Array;
+  docIds: Uint32Array;
+  weights: Float32Array;
+};
+
+const indexCache = new Map<string, { index: RetrievalIndex | null; loadedAt: number }>();
+
+function parseIndex(buffer: ArrayBuffer): RetrievalIndex {
+  const view = new DataView(buffer);
+  const magic = new TextDecoder().decode(new Uint8Array(buffer, 0, 4));
+  if (magic !== 'HMRI' || view.getUint32(4, true) !== 1) {
+    throw new Error('Unsupported retrieval index');
+  }
+  const headerLength = view.getUint32(8, true);
+  const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 12, headerLength)));
+  const termCount = header.terms.length;
+  let offset = 12 + headerLength;
+  const take = <T>(make: (offset: number) => T, bytes: number): T => {
+    const array = make(offset);
+    offset += bytes;
+    return array;
+  };
+  return {
+    idColumn: header.id_column,
+    terms: new Map(header.terms.map((term: string, i: number) => [term, i])),
+    stopwords: new Set(header.stopwords),
+    ids: take((o) => new Int32Array(buffer, o, header.doc_count), 4 * header.doc_count),
+    idf: take((o) => new Float32Array(buffer, o, termCount), 4 * termCount),
+    termPtr: take((o) => new Uint32Array(buffer, o, termCount + 1), 4 * (termCount + 1)),
+    docIds: take((o) => new Uint32Array(buffer, o, header.nnz), 4 * header.nnz),
+    weights: take((o) => new Float32Array(buffer, o, header.nnz), 4 * header.nnz),
+  };
+}
+
+// Must tokenise exactly like retrieval_index.tokenize()
+function tokenize(text: string, stopwords: Set<string>): string[] {
+  const words = text.normalize('NFKD').replace(/[^\x00-\x7f]/g, '').toLowerCase().match(/[a-z0-9]+/g) ?? [];
+  return words.filter((word) => word.length > 1 && !stopwords.has(word));
+}
+
+function queryIndex(index: RetrievalIndex, text: string, k: number): number[] {
+  const counts = new Map<number, number>();
+  for (const token of tokenize(text, index.stopwords)) {
+    const term = index.terms.get(token);
+    if (term !== undefined) counts.set(term, (counts.get(term) ?? 0) + 1);
+  }
+  const vector = [...counts].map(([term, count]) => [term, (1 + Math.log(count)) * index.idf[term]]);
+  const norm = Math.sqrt(vector.reduce((sum, [, weight]) => sum + weight * weight, 0));
+  const scores = new Map<number, number>();
+  for (const [term, weight] of vector) {
+    for (let i = index.termPtr[term]; i < index.termPtr[term + 1]; i++) {
+      const doc = index.docIds[i];
+      scores.set(doc, (scores.get(doc) ?? 0) + (weight / norm) * index.weights[i]);
+    }
+  }
+  return [...scores].sort((a, b) => b[1] - a[1]).slice(0, k).map(([doc]) => index.ids[doc]);
+}
+
+async function loadIndex(supabase: any, table: string): Promise<RetrievalIndex | null> {
+  const cached = indexCache.get(table);
+  if (cached && Date.now() - cached.loadedAt < INDEX_TTL_MS) return cached.index;
+  let index: RetrievalIndex | null = null;
+  try {
+    const { data, error } = await supabase.storage.from(INDEX_BUCKET).download(`${table}.idx`);
+    if (error) throw error;
+    index = parseIndex(await data.arrayBuffer());
+  } catch (error) {
+    console.warn(`No retrieval index for ${table}, sending the full table:`, error);
+  }
+  indexCache.set(table, { index, loadedAt: Date.now() });
+  return index;
+}
+
+// Rows of `table` to put in the prompt: the indexed shortlist for the prompt, or every row without an index
+async function selectCandidates(supabase: any, table: string, prompt: string) {
+  const index = await loadIndex(supabase, table);
+  const ids = index ? queryIndex(index, prompt, SHORTLIST_SIZE) : [];
+  if (index && ids.length > 0) {
+    return await supabase.from(table).select('*').in(index.idColumn, ids);
+  }
+  return await supabase.from(table).select('*');
+}
+
 serve(async (req) => {
   if (req.method === 'OPTIONS') {
     return new Response(null, { headers: corsHeaders });
@@ -27,9 +121,7 @@ serve(async (req) => {
 
     if (userType === 'startup_seeker') {
       // For users looking for startups, search in startup table
-      ({ data, error } = await supabase
-        .from('startup')
-        .select('*'));
+      ({ data, error } = await selectCandidates(supabase, 'startup', prompt));
       
       targetEntity = 'startups';
       context = data?.map(s => 
@@ -37,9 +129,7 @@ serve(async (req) => {
       ).join('\n') || '';
     } else {
       // For VC users, search in grant_programs table
-      ({ data, error } = await supabase
-        .from('grant_programs')
-        .select('*'));
+      ({ data, error } = await selectCandidates(supabase, 'grant_programs', prompt));
       
       targetEntity = 'VC firms and grant programs';
       context = data?.map(g => 
@@ -0,0 +1,18 @@
+-- Natural keys written by the Python scrapers so re-crawls upsert instead of appending duplicates.
+-- dedup_key is the canonical website URL plus normalised company (and fund) name; content_hash
+-- lets the scrapers skip rows that haven't changed. Rows written before this migration keep NULL
+-- keys, which the unique constraints allow.
+
+alter table public.startup
+  add column if not exists dedup_key text,
+  add column if not exists content_hash text;
+
+alter table public.startup
+  add constraint startup_dedup_key_key unique (dedup_key);
+
+alter table public.grant_programs
+  add column if not exists dedup_key text,
+  add column if not exists content_hash text;
+
+alter table public.grant_programs
+  add constraint grant_programs_dedup_key_key unique (dedup_key);
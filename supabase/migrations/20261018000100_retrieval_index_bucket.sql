@@ -0,0 +1,6 @@
+-- Private bucket for the TF-IDF retrieval indexes the Python scrapers publish after each run
+-- (startup.idx, grant_programs.idx). Only the service role (scrapers, ai-matchmaker) reads or writes it.
+
+insert into storage.buckets (id, name, public)
+values ('retrieval-index', 'retrieval-index', false)
+on conflict (id) do nothing;
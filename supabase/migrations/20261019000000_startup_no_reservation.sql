@@ -0,0 +1,30 @@
+-- Atomic allocation of startup."No" for the Python scrapers. Each run reserves blocks of numbers
+-- through reserve_startup_numbers(), so concurrent runs never hand out the same No. The counter row
+-- is locked by the UPDATE, and it never falls behind rows inserted with an explicit No.
+
+create table if not exists public.startup_no_counter (
+  id boolean primary key default true check (id),
+  last_no bigint not null
+);
+
+insert into public.startup_no_counter (id, last_no)
+select true, coalesce(max("No"), 0) from public.startup
+on conflict (id) do nothing;
+
+alter table public.startup_no_counter enable row level security;
+
+-- Returns the first number of a block of `block_size` consecutive numbers reserved for the caller
+create or replace function public.reserve_startup_numbers(block_size integer)
+returns bigint
+language sql
+volatile
+security definer
+set search_path = public
+as $$
+  update public.startup_no_counter
+  set last_no = greatest(last_no, (select coalesce(max("No"), 0) from public.startup)) + block_size
+  where id
+  returning last_no - block_size + 1;
+$$;
+
+revoke execute on function public.reserve_startup_numbers(integer) from public, anon, authenticated;